@@ -4,25 +4,70 @@ from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate  # Add this import
 from app.config import Config
+from app.database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 ma = Marshmallow()
 jwt = JWTManager()
 migrate = Migrate()  # Initialize the migrate variable
 
-def create_app():
+def create_app(replica_url=None):
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Optional read replica, used for GET requests by RoutingSession
+    replica_url = replica_url or app.config.get('REPLICA_DATABASE_URL')
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}),
+            'replica': {'url': replica_url, **app.config['SQLALCHEMY_ENGINE_OPTIONS']},
+        }
+
     db.init_app(app)
     ma.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)  # Initialize Flask-Migrate with your app and db
 
-    with app.app_context():
-        db.create_all()
+    from app import database
+    database.init_app(app)
+
+    from app import instrumentation
+    instrumentation.init_app(app)
+
+    from app.cache import response_cache
+    response_cache.init_app(app)
+
+    from app.passwords import password_hasher
+    password_hasher.init_app(app)
+
+    from app.similar import similar_index
+    similar_index.init_app(app)
+
+    from app.events import event_broker
+    event_broker.init_app(app)
+
+    # Migrations own the schema; see DB_STARTUP in config.py
+    if app.config['DB_STARTUP'] == 'create':
+        database.create_schema(app)
+    elif app.config['DB_STARTUP'] == 'check':
+        database.check_schema_version(app)
 
     from app.routes import main
     app.register_blueprint(main)
 
+    from app import identity
+    identity.init_app(app)
+
+    from app import idempotency
+    idempotency.init_app(app)
+
+    from app.search import rebuild_search_index_command
+    app.cli.add_command(rebuild_search_index_command)
+
+    from app.facets import reconcile_facets_command
+    app.cli.add_command(reconcile_facets_command)
+
+    from app.popularity import repair_popularity_command
+    app.cli.add_command(repair_popularity_command)
+
     return app
@@ -0,0 +1,110 @@
+# app/bulk.py
+
+import csv
+import io
+import json
+
+from flask import current_app
+from marshmallow import ValidationError
+
+from app import db
+from app.models import Property
+from app import schemas
+from app.search import index_properties
+from app.geo import geohash_for
+from app.facets import count_properties
+from app.similar import remember_properties
+
+
+class BulkImportError(ValueError):
+    """Raised when an upload cannot be parsed into rows at all."""
+
+
+def _parse_ndjson(text):
+    rows = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            raise BulkImportError(f"Invalid JSON on line {number}")
+    return rows
+
+
+def _parse_csv(text):
+    # A blank cell means no value, as if the key were left out of a JSON row
+    return [{name: value for name, value in row.items() if value != ''} for row in csv.DictReader(io.StringIO(text))]
+
+
+def parse_upload(request):
+    """Read the uploaded rows from a JSON array, NDJSON or CSV body or file."""
+    upload = request.files.get('file')
+    if upload is not None:
+        text = upload.read().decode('utf-8-sig')
+        name = (upload.filename or '').lower()
+        if name.endswith('.csv') or upload.mimetype == 'text/csv':
+            rows = _parse_csv(text)
+        elif name.endswith('.ndjson') or upload.mimetype == 'application/x-ndjson':
+            rows = _parse_ndjson(text)
+        else:
+            try:
+                rows = json.loads(text)
+            except ValueError:
+                raise BulkImportError("Uploaded file is not valid JSON")
+    elif request.mimetype == 'text/csv':
+        rows = _parse_csv(request.get_data(as_text=True))
+    elif request.mimetype == 'application/x-ndjson':
+        rows = _parse_ndjson(request.get_data(as_text=True))
+    else:
+        rows = request.get_json(silent=True)
+
+    if not isinstance(rows, list):
+        raise BulkImportError("Expected a JSON array, NDJSON or CSV upload")
+    if len(rows) > current_app.config['BULK_IMPORT_MAX_ROWS']:
+        raise BulkImportError(f"At most {current_app.config['BULK_IMPORT_MAX_ROWS']} rows per upload")
+    return rows
+
+
+def import_properties(rows, agent):
+    """Validate ``rows`` and insert the valid ones for ``agent`` in one transaction.
+
+    Returns the ids of the inserted properties and a dict of per-row
+    validation errors keyed by row index. Rows are written in chunks of
+    ``BULK_INSERT_CHUNK_SIZE`` with a single multi-row INSERT each; the
+    search index and facet counts are updated in the same transaction, and
+    the similar-listings index once it commits.
+    """
+    errors = {}
+    try:
+        loaded = schemas.shared('PropertyImportSchema').load(rows, many=True)
+    except ValidationError as e:
+        errors = e.messages if isinstance(e.messages, dict) else {0: e.messages}
+        loaded = e.valid_data
+
+    agent_details = {'listed_by': agent['id'], 'agent_name': agent['username'], 'agent_email': agent['email']}
+    valid = [
+        {
+            'latitude': None, 'longitude': None, **row, **agent_details,
+            'geohash': geohash_for(row.get('latitude'), row.get('longitude')),
+        }
+        for index, row in enumerate(loaded)
+        if index not in errors
+    ]
+
+    chunk_size = current_app.config['BULK_INSERT_CHUNK_SIZE']
+    statement = Property.__table__.insert().returning(
+        Property.id, Property.title, Property.description, Property.location, Property.price, Property.property_type
+    )
+    ids = []
+    for start in range(0, len(valid), chunk_size):
+        inserted = db.session.execute(statement, valid[start:start + chunk_size]).mappings().all()
+        index_properties(db.session.connection(), [
+            {name: row[name] for name in ('id', 'title', 'description', 'location')} for row in inserted
+        ])
+        remember_properties(db.session, inserted)
+        count_properties(db.session.connection(), valid[start:start + chunk_size])
+        ids.extend(row['id'] for row in inserted)
+    db.session.commit()
+
+    return ids, errors
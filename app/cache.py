@@ -0,0 +1,236 @@
+# app/cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+_UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+
+class ResponseCache:
+    """Bounded LRU cache of serialized GET responses with per-table versions.
+
+    Every cached entry is keyed by the endpoint, the query string, the user
+    (for per-user views) and the current version of each table the view reads
+    from. The versions live in the ``table_version`` table, so a write
+    through any worker invalidates every worker's entries: write handlers
+    call ``bump`` after their commit, and each cached request reads the
+    versions it needs with one primary-key lookup. That lookup goes through
+    the request's session, so with a read replica it returns the versions
+    the replica has caught up to and the entry describes exactly the data
+    read from it; replica lag is never cached under a newer key. Stale
+    entries are never served and age out of the LRU, or after ``ttl``
+    seconds at the latest, as a backstop for writes made outside the app.
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.max_entries = 1024
+        self.max_bytes = 32 * 1024 * 1024
+        self.ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+        self.max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        app.extensions['response_cache'] = self
+
+    def bump(self, *tables):
+        """Advance the shared version of ``tables``; call once the write has committed.
+
+        A reader that fetched the old version before this runs can only have
+        read data at least as new as that version, so nothing stale is cached.
+        """
+        from app.models import TableVersion
+
+        table = TableVersion.__table__
+        with current_app.extensions['sqlalchemy'].engine.begin() as connection:
+            insert = _UPSERTS.get(connection.dialect.name)
+            if insert is not None:
+                statement = insert(table)
+                connection.execute(
+                    statement.on_conflict_do_update(index_elements=[table.c.name],
+                                                    set_={'version': table.c.version + 1}),
+                    [{'name': name, 'version': 1} for name in tables],
+                )
+            else:
+                for name in tables:
+                    result = connection.execute(
+                        update(table).where(table.c.name == name).values(version=table.c.version + 1)
+                    )
+                    if result.rowcount == 0:
+                        connection.execute(table.insert(), {'name': name, 'version': 1})
+
+    def versions(self, tables):
+        """Versions of ``tables`` in the database this request reads from, before any data is read."""
+        from app.models import TableVersion
+
+        session = current_app.extensions['sqlalchemy'].session
+        stored = dict(session.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+        ).all())
+        return tuple(stored.get(name, 0) for name in tables)
+
+    def etag(self, key):
+        # Versions are shared, so every worker computes the same ETag
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                self._size -= len(self._entries.pop(key)[0])
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, body, headers):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key)[0])
+            self._entries[key] = (body, headers, time.monotonic() + self.ttl)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (old_body, _, _) = self._entries.popitem(last=False)
+                self._size -= len(old_body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache()
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key, value):
+        """Set ``key`` only if it is absent or expired; returns whether it was set."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+# Response headers that are part of the cached representation
+CACHED_HEADERS = ('X-Next-Cursor',)
+
+
+def cached_response(*tables, per_user=False, user_tables=(), extra_tables=None):
+    """Serve GET requests from ``response_cache`` and answer ``If-None-Match`` with 304.
+
+    ``tables`` lists every table the view reads; ``per_user`` adds the JWT
+    user id to the key for views whose output depends on who is asking. It
+    may also be a callable deciding that per request, in which case
+    ``user_tables`` are the extra tables read only by the per-user variant.
+    ``extra_tables`` is an optional callable returning tables that only some
+    requests read (e.g. for one sort order).
+    Must be applied below ``jwt_required``. Other methods pass straight through.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            personal = per_user() if callable(per_user) else per_user
+            read_tables = tables + tuple(user_tables) if personal else tables
+            if extra_tables is not None:
+                read_tables += tuple(extra_tables())
+
+            user_id = get_jwt_identity()['id'] if personal else None
+            key = (
+                request.endpoint,
+                tuple(sorted(request.args.items(multi=True))),
+                user_id,
+                response_cache.versions(read_tables),
+            )
+            etag = response_cache.etag(key)
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                entry = response_cache.get(key)
+                if entry is not None:
+                    body, headers = entry
+                    response = Response(body, status=200, mimetype='application/json', headers=headers)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                    response_cache.set(key, response.get_data(), headers)
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -1,7 +1,109 @@
 import os
 
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///real_estate.db')
+
+# Engine tuning per database type. The profile defaults to the one matching
+# DATABASE_URL and can be forced with DB_PROFILE.
+ENGINE_PROFILES = {
+    'sqlite': {
+        # Seconds the driver waits on a locked database before raising
+        'connect_args': {'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000},
+    },
+    'server': {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    },
+}
+DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite' if DATABASE_URL.startswith('sqlite') else 'server')
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///real_estate.db'
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
+    SQLALCHEMY_ENGINE_OPTIONS = ENGINE_PROFILES[DB_PROFILE]
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # What create_app does about the schema: 'check' compares the Alembic
+    # revision with the migrations head, 'create' runs create_all() for
+    # throwaway databases, 'none' trusts the deployment
+    DB_STARTUP = os.getenv('DB_STARTUP', 'check')
+    # Optional read replica; see create_app
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    # How long a user's own reads stay on the primary after they write
+    READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
     SECRET_KEY = os.getenv('SECRET_KEY', 'mysecret')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwtsecret')
+
+    # Keyset pagination for list endpoints
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 200))
+
+    # In-process cache of serialized GET responses
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Upper bound on an entry's age, for writes made outside the app
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+
+    # Rows fetched per round-trip by the streaming export endpoints
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+    # Bulk property import limits
+    BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', 50000))
+    BULK_INSERT_CHUNK_SIZE = int(os.getenv('BULK_INSERT_CHUNK_SIZE', 1000))
+
+    # Most listings DELETE /properties/batch removes in one request
+    BATCH_DELETE_MAX_IDS = int(os.getenv('BATCH_DELETE_MAX_IDS', 1000))
+
+    # Process-local user profile cache for tokens without full identity claims
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))
+
+    # PRAGMAs applied to every new SQLite connection. WAL lets readers run
+    # alongside a writer; with NORMAL sync a power failure can lose the last
+    # commits but never corrupts the database.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),  # negative means KiB
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'temp_store': 'MEMORY',
+    }
+
+    # Password hashing runs on a bounded pool (see app/passwords.py).
+    # Hashes made with another method are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 16))
+
+    # Per-request SQL counts and timings in the Server-Timing header and the
+    # app.requests log, with warnings for statements repeated N+1 style
+    SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'true').lower() not in ('0', 'false', 'no')
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+    # Sample request stacks and log the hottest ones for requests slower
+    # than this many milliseconds; 0 disables the profiler
+    PROFILE_SLOW_REQUEST_MS = int(os.getenv('PROFILE_SLOW_REQUEST_MS', 0))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+
+    # Largest radius accepted by GET /properties/nearby
+    MAX_SEARCH_RADIUS_KM = float(os.getenv('MAX_SEARCH_RADIUS_KM', 200))
+
+    # Lower bounds of the price buckets counted by GET /properties/facets.
+    # Run `flask reconcile-facets` after changing them.
+    FACET_PRICE_BUCKETS = [float(bound) for bound in os.getenv('FACET_PRICE_BUCKETS', '0,500,1000,2000,5000,100000,500000').split(',')]
+
+    # GET /properties/<id>/similar. Each worker keeps its own index and
+    # rebuilds it after this many seconds to pick up other workers' writes;
+    # 0 keeps it for the life of the process
+    SIMILAR_INDEX_MAX_AGE = int(os.getenv('SIMILAR_INDEX_MAX_AGE', 300))
+    SIMILAR_MAX_K = int(os.getenv('SIMILAR_MAX_K', 50))
+
+    # GET /events: events kept for Last-Event-ID resume, seconds between
+    # keep-alive comments, and open streams allowed per worker
+    EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', 1000))
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', 10000))
+
+    # Responses kept for POST retries carrying an Idempotency-Key
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', 20000))
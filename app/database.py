@@ -0,0 +1,116 @@
+# app/database.py
+
+import os
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+from app.cache import TTLCache
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Users who wrote recently, so their own reads stay on the primary until the
+# replica has caught up. Sized and timed by init_app.
+recent_writers = TTLCache()
+
+
+def _current_user_id():
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:  # no JWT was verified for this request
+        return None
+    return identity['id'] if identity else None
+
+
+def _reads_from_replica():
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    user_id = _current_user_id()
+    return user_id is None or recent_writers.get(user_id) is None
+
+
+class RoutingSession(Session):
+    """Session that sends read-only requests to the ``replica`` bind when one is configured.
+
+    GET and HEAD requests read from the replica unless the current user made
+    a write within ``READ_YOUR_WRITES_SECONDS``; everything else, and any
+    flush, goes to the primary. That window is a guess at the replica's lag,
+    not a measurement, and ``recent_writers`` is per process: a user whose
+    next read reaches another worker, or a replica lagging longer than the
+    window, can read their write back stale.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and 'replica' in self._db.engines and _reads_from_replica():
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return on_connect
+
+
+def _remember_writer(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        user_id = _current_user_id()
+        if user_id is not None:
+            recent_writers.set(user_id, True)
+    return response
+
+
+def _migration_heads(app):
+    from alembic.config import Config as AlembicConfig
+    from alembic.script import ScriptDirectory
+
+    # Flask-Migrate's default directory is relative to the project, not the cwd
+    directory = os.path.join(os.path.dirname(app.root_path), app.extensions['migrate'].directory)
+    config = AlembicConfig()
+    config.set_main_option('script_location', directory)
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def check_schema_version(app):
+    """Warn when the database is not at the migrations head; one query, no reflection."""
+    with app.app_context():
+        try:
+            with app.extensions['sqlalchemy'].engine.connect() as connection:
+                current = set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+        except DBAPIError:
+            current = set()
+    heads = _migration_heads(app)
+    if current != heads:
+        app.logger.warning(
+            "Database schema is at %s but the migrations head is %s; run `flask db upgrade`.",
+            ', '.join(sorted(current)) or 'no revision', ', '.join(sorted(heads)),
+        )
+
+
+def create_schema(app):
+    """Create missing tables straight from the models, for throwaway and development databases."""
+    from app import db, models, search  # noqa: F401 - register the tables and the FTS DDL
+
+    with app.app_context():
+        db.create_all()
+
+
+def init_app(app):
+    """Install the per-connection hooks and replica routing for the configured engines."""
+    with app.app_context():
+        engines = app.extensions['sqlalchemy'].engines
+    for engine in engines.values():
+        if engine.dialect.name == 'sqlite':
+            # SQLite ignores ON DELETE CASCADE unless foreign keys are enforced
+            pragmas = {'foreign_keys': 'ON', **app.config.get('SQLITE_PRAGMAS', {})}
+            event.listen(engine, 'connect', _apply_pragmas(pragmas))
+
+    if 'replica' in engines:
+        recent_writers.ttl = app.config['READ_YOUR_WRITES_SECONDS']
+        app.after_request(_remember_writer)
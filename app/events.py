@@ -0,0 +1,134 @@
+# app/events.py
+
+import json
+import os
+import threading
+from collections import deque
+from itertools import islice
+
+
+class TooManySubscribers(Exception):
+    """Raised when ``max_subscribers`` streams are already open."""
+
+
+class EventBroker:
+    """In-process publish/subscribe for the ``/events`` Server-Sent Events stream.
+
+    Write handlers ``publish`` after their commit. Events go into a ring
+    buffer of the last ``buffer_size`` events and every subscriber wakes on
+    one shared condition, so an idle subscriber costs one blocked thread
+    (or greenlet) and a cursor, and publishing never blocks on slow readers.
+    Each event may be limited to a set of user ids; otherwise everyone sees
+    it. Event ids carry a per-process epoch, so a ``Last-Event-ID`` from
+    another process or from before the buffer wrapped is answered with a
+    ``reset`` event telling the client to refetch. Like ``response_cache``
+    this lives in process memory: subscribers only see writes made by the
+    worker they are connected to.
+    """
+
+    def __init__(self, app=None):
+        self._events = deque()
+        self._sequence = 0
+        self._subscribers = 0
+        self._condition = threading.Condition()
+        self._epoch = os.urandom(4).hex()
+        self.buffer_size = 1000
+        self.heartbeat = 15
+        self.max_subscribers = 10000
+        self.published = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.buffer_size = app.config['EVENTS_BUFFER_SIZE']
+        self.heartbeat = app.config['EVENTS_HEARTBEAT_SECONDS']
+        self.max_subscribers = app.config['EVENTS_MAX_SUBSCRIBERS']
+        self._events = deque(self._events, maxlen=self.buffer_size)
+        app.extensions['event_broker'] = self
+
+    def publish(self, event_type, data, users=None):
+        """Queue an event for every subscriber, or only those in ``users``."""
+        body = json.dumps(data, separators=(',', ':'))
+        with self._condition:
+            self._sequence += 1
+            self._events.append((self._sequence, event_type, body, frozenset(users) if users else None))
+            self.published += 1
+            self._condition.notify_all()
+
+    def _cursor(self, last_event_id):
+        """Sequence number to resume after, and whether events were missed."""
+        if last_event_id is None:
+            return self._sequence, False
+        epoch, _, sequence = last_event_id.partition('-')
+        if epoch != self._epoch or not sequence.isdigit() or int(sequence) > self._sequence:
+            return self._sequence, True
+        oldest = self._events[0][0] if self._events else self._sequence + 1
+        if int(sequence) < oldest - 1:
+            # Replay what is still buffered after the reset
+            return oldest - 1, True
+        return int(sequence), False
+
+    def _after(self, cursor):
+        if not self._events or cursor >= self._sequence:
+            return []
+        return list(islice(self._events, max(0, cursor - self._events[0][0] + 1), None))
+
+    def _format(self, sequence, event_type, body):
+        return f"id: {self._epoch}-{sequence}\nevent: {event_type}\ndata: {body}\n\n"
+
+    def subscribe(self, user_id, last_event_id=None, types=None):
+        """Return a generator of SSE frames visible to ``user_id``, resuming after ``last_event_id``.
+
+        ``types`` optionally limits the stream to event types starting with
+        one of the given prefixes. Raises ``TooManySubscribers`` when full.
+        """
+        with self._condition:
+            if self._subscribers >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscribers += 1
+            cursor, missed = self._cursor(last_event_id)
+        stream = self._stream(user_id, cursor, missed, tuple(types) if types else None)
+        # Enter the try block now, so closing the stream always frees the slot
+        # even if the client goes away before the first frame is sent
+        next(stream)
+        return stream
+
+    def _stream(self, user_id, cursor, missed, types):
+        try:
+            yield None
+            yield "retry: 3000\n\n"  # reconnect after 3 s if the connection drops
+            if missed:
+                # Too far behind to replay; the client should refetch its lists
+                yield self._format(cursor, 'reset', '{}')
+            while True:
+                with self._condition:
+                    events = self._after(cursor)
+                    if not events:
+                        self._condition.wait(self.heartbeat)
+                        events = self._after(cursor)
+                    if events and events[0][0] > cursor + 1:
+                        # The buffer wrapped while this subscriber was writing
+                        events.insert(0, (events[0][0] - 1, 'reset', '{}', None))
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                frames = []
+                for sequence, event_type, body, users in events:
+                    cursor = sequence
+                    # A reset concerns every stream, whatever types it asked for
+                    if (users is None or user_id in users) and (
+                        types is None or event_type == 'reset' or event_type.startswith(types)
+                    ):
+                        frames.append(self._format(sequence, event_type, body))
+                if frames:
+                    yield ''.join(frames)
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+
+    def stats(self):
+        with self._condition:
+            return {'subscribers': self._subscribers, 'published': self.published, 'buffered': len(self._events)}
+
+
+event_broker = EventBroker()
@@ -0,0 +1,187 @@
+# app/facets.py
+
+from bisect import bisect_right
+from collections import Counter
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, event, func, inspect, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import Property, PropertyFacet
+
+# Facet names, and the property columns they are computed from
+FACETS = ('property_type', 'location', 'price')
+FACET_COLUMNS = ('property_type', 'location', 'price')
+
+_UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+
+def price_bucket(price, bounds=None):
+    """Return the facet value for ``price``: the lower bound of its bucket.
+
+    ``price`` may still be the string a JSON body sent; the column stores it
+    as a float.
+    """
+    bounds = bounds or current_app.config['FACET_PRICE_BUCKETS']
+    return _format_bound(bounds[max(0, bisect_right(bounds, float(price)) - 1)])
+
+
+def _format_bound(bound):
+    return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+
+def facet_values(values):
+    """Facet keys for a property given its property_type, location and price."""
+    return [
+        ('property_type', values['property_type']),
+        ('location', values['location']),
+        ('price', price_bucket(values['price'])),
+    ]
+
+
+def _current_values(target):
+    return {name: getattr(target, name) for name in FACET_COLUMNS}
+
+
+def apply_deltas(connection, deltas):
+    """Add ``deltas`` ({(facet, value): change}) to the stored counts.
+
+    Runs on the connection of the flush that changed the properties, so the
+    counts commit or roll back together with them. SQLite and PostgreSQL use
+    a single INSERT .. ON CONFLICT per batch; other engines update and insert
+    the missing rows.
+    """
+    rows = [{'facet': facet, 'value': value, 'count': change}
+            for (facet, value), change in deltas.items() if change]
+    if not rows:
+        return
+    table = PropertyFacet.__table__
+    insert = _UPSERTS.get(connection.dialect.name)
+    if insert is not None:
+        statement = insert(table)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.facet, table.c.value],
+                set_={'count': table.c['count'] + statement.excluded['count']},
+            ),
+            rows,
+        )
+        return
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.facet == row['facet'], table.c.value == row['value'])
+            .values(count=table.c['count'] + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+
+def count_properties(connection, rows):
+    """Count property rows that were inserted without going through the ORM."""
+    apply_deltas(connection, Counter(key for row in rows for key in facet_values(row)))
+
+
+def uncount_properties(connection, rows):
+    """Uncount property rows that are deleted without going through the ORM."""
+    deltas = Counter()
+    deltas.subtract(key for row in rows for key in facet_values(row))
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Property, 'after_insert')
+def _property_inserted(mapper, connection, target):
+    apply_deltas(connection, Counter(facet_values(_current_values(target))))
+
+
+@event.listens_for(Property, 'after_update')
+def _property_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in FACET_COLUMNS):
+        return
+    old = {}
+    for name in FACET_COLUMNS:
+        history = state.attrs[name].history
+        old[name] = history.deleted[0] if history.deleted else getattr(target, name)
+    deltas = Counter(facet_values(_current_values(target)))
+    deltas.subtract(facet_values(old))
+    apply_deltas(connection, deltas)
+
+
+# before_delete so expired attributes can still be loaded from the row
+@event.listens_for(Property, 'before_delete')
+def _property_deleted(mapper, connection, target):
+    deltas = Counter()
+    deltas.subtract(facet_values(_current_values(target)))
+    apply_deltas(connection, deltas)
+
+
+def facet_counts():
+    """Return the non-empty counts per facet, largest first."""
+    rows = db.session.execute(
+        select(PropertyFacet.facet, PropertyFacet.value, PropertyFacet.count)
+        .where(PropertyFacet.count > 0)
+        .order_by(PropertyFacet.facet, PropertyFacet.count.desc(), PropertyFacet.value)
+    )
+    counts = {facet: [] for facet in FACETS}
+    bounds = current_app.config['FACET_PRICE_BUCKETS']
+    upper = {_format_bound(low): high for low, high in zip(bounds, bounds[1:])}
+    for facet, value, count in rows:
+        entry = {'value': value, 'count': count}
+        if facet == 'price':
+            entry['min'] = float(value)
+            entry['max'] = upper.get(value)
+        counts.setdefault(facet, []).append(entry)
+    counts['price'].sort(key=lambda entry: entry['min'])
+    return counts
+
+
+def _actual_counts():
+    bounds = current_app.config['FACET_PRICE_BUCKETS']
+    # Same bucketing as price_bucket, evaluated in SQL
+    bucket = case(
+        *((Property.price < high, literal(_format_bound(low))) for low, high in zip(bounds, bounds[1:])),
+        else_=literal(_format_bound(bounds[-1])),
+    )
+    counts = Counter()
+    for facet, column in (('property_type', Property.property_type), ('location', Property.location),
+                          ('price', bucket)):
+        for value, count in db.session.execute(select(column, func.count()).group_by(column)):
+            counts[(facet, value)] = count
+    return counts
+
+
+@click.command('reconcile-facets')
+@click.option('--check', is_flag=True, help="Only report drift; exit with status 1 if there is any.")
+@with_appcontext
+def reconcile_facets_command(check):
+    """Recount property facets from the property table and report drift."""
+    actual = _actual_counts()
+    stored = Counter({
+        (facet, value): count
+        for facet, value, count in db.session.execute(
+            select(PropertyFacet.facet, PropertyFacet.value, PropertyFacet.count)
+        )
+    })
+    drift = sorted(key for key in actual.keys() | stored.keys() if actual[key] != stored[key])
+    for facet, value in drift:
+        click.echo(f"{facet}={value}: stored {stored[(facet, value)]}, actual {actual[(facet, value)]}")
+
+    if check:
+        click.echo(f"{len(drift)} facet counts drifted.")
+        if drift:
+            raise SystemExit(1)
+        return
+
+    db.session.execute(PropertyFacet.__table__.delete())
+    if actual:
+        db.session.execute(
+            PropertyFacet.__table__.insert(),
+            [{'facet': facet, 'value': value, 'count': count} for (facet, value), count in actual.items()],
+        )
+    db.session.commit()
+    click.echo(f"Rebuilt {len(actual)} facet counts; {len(drift)} had drifted.")
@@ -0,0 +1,113 @@
+# app/filters.py
+
+from flask import current_app
+
+from app.models import Property, Application
+from app.pagination import PaginationError
+
+# Sort orders accepted by GET /properties, mapped to (key columns, descending).
+# Every key ends with Property.id so the order is total and usable as a cursor.
+PROPERTY_SORTS = {
+    'newest': ((Property.id,), True),
+    'oldest': ((Property.id,), False),
+    'price_asc': ((Property.price, Property.id), False),
+    'price_desc': ((Property.price, Property.id), True),
+    'popular': ((Property.application_count, Property.wishlist_count, Property.id), True),
+}
+
+PROPERTY_TYPES = Property.property_type.type.enums
+APPLICATION_STATUSES = Application.status.type.enums
+
+
+def parse_float(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be a number")
+
+
+def _parse_int(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an integer")
+
+
+def _parse_ids(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        ids = [int(part) for part in value.split(',')]
+    except ValueError:
+        raise PaginationError(f"{name} must be comma-separated integers")
+    if len(ids) > current_app.config['MAX_PAGE_SIZE']:
+        raise PaginationError(f"At most {current_app.config['MAX_PAGE_SIZE']} {name} per request")
+    return ids
+
+
+def _parse_bool(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise PaginationError(f"{name} must be true or false")
+
+
+def filter_properties(query, args):
+    """Apply the id/price/type/location/approval filters from the query string."""
+    ids = _parse_ids(args, 'ids')
+    min_price = parse_float(args, 'min_price')
+    max_price = parse_float(args, 'max_price')
+    is_approved = _parse_bool(args, 'is_approved')
+    property_type = args.get('property_type')
+    location = args.get('location')
+
+    if ids is not None:
+        query = query.filter(Property.id.in_(ids))
+    if property_type is not None:
+        if property_type not in PROPERTY_TYPES:
+            raise PaginationError(f"property_type must be one of {', '.join(PROPERTY_TYPES)}")
+        query = query.filter(Property.property_type == property_type)
+    if location is not None:
+        query = query.filter(Property.location == location)
+    if is_approved is not None:
+        query = query.filter(Property.is_approved == is_approved)
+    if min_price is not None:
+        query = query.filter(Property.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Property.price <= max_price)
+    return query
+
+
+def property_sort(args):
+    sort = args.get('sort', 'newest')
+    if sort not in PROPERTY_SORTS:
+        raise PaginationError(f"sort must be one of {', '.join(PROPERTY_SORTS)}")
+    return PROPERTY_SORTS[sort]
+
+
+def filter_applications(query, args):
+    """Apply the id/status/property filters from the query string."""
+    ids = _parse_ids(args, 'ids')
+    status = args.get('status')
+    property_id = _parse_int(args, 'property_id')
+
+    if ids is not None:
+        query = query.filter(Application.id.in_(ids))
+    if status is not None:
+        if status not in APPLICATION_STATUSES:
+            raise PaginationError(f"status must be one of {', '.join(APPLICATION_STATUSES)}")
+        query = query.filter(Application.status == status)
+    if property_id is not None:
+        query = query.filter(Application.property_id == property_id)
+    return query
@@ -0,0 +1,124 @@
+# app/geo.py
+
+import math
+
+from sqlalchemy import and_, event, or_
+
+from app.models import Property
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+# Upper bound on geohash cells used to cover one search area
+MAX_COVER_CELLS = 16
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def _cells(min_lat, min_lon, max_lat, max_lon, precision):
+    height, width = _cell_size(precision)
+    lat_start = math.floor((min_lat + 90) / height)
+    lat_end = math.floor((min(max_lat, 90 - 1e-9) + 90) / height)
+    lon_start = math.floor((min_lon + 180) / width)
+    lon_end = math.floor((min(max_lon, 180 - 1e-9) + 180) / width)
+    if (lat_end - lat_start + 1) * (lon_end - lon_start + 1) > MAX_COVER_CELLS:
+        return None
+    return {
+        encode_geohash(-90 + (i + 0.5) * height, -180 + (j + 0.5) * width, precision)
+        for i in range(lat_start, lat_end + 1)
+        for j in range(lon_start, lon_end + 1)
+    }
+
+
+def cover(min_lat, min_lon, max_lat, max_lon):
+    """Return the geohash prefixes of the finest grid that covers the box in few cells."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cells = _cells(min_lat, min_lon, max_lat, max_lon, precision)
+        if cells is not None:
+            return cells
+    return {''}
+
+
+def within_box(query, min_lat, min_lon, max_lat, max_lon):
+    """Restrict ``query`` to properties inside the box.
+
+    Each covering geohash cell becomes a range scan on ix_property_geohash;
+    the exact bounds are then checked on latitude/longitude. Boxes crossing
+    the antimeridian are not supported.
+    """
+    prefixes = sorted(cover(min_lat, min_lon, max_lat, max_lon))
+    ranges = [and_(Property.geohash >= prefix, Property.geohash < prefix + '~') for prefix in prefixes]
+    return query.filter(
+        or_(*ranges),
+        Property.latitude.between(min_lat, max_lat),
+        Property.longitude.between(min_lon, max_lon),
+    )
+
+
+def radius_box(lat, lon, radius_km):
+    """Bounding box around a circle, clamped to valid coordinates."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    lon_delta = 180.0 if cos_lat < 1e-6 else min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, lat - lat_delta), max(-180.0, lon - lon_delta),
+        min(90.0, lat + lat_delta), min(180.0, lon + lon_delta),
+    )
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(latitude, longitude):
+    """Validate an optional latitude/longitude pair, raising ValueError when invalid."""
+    if latitude is None and longitude is None:
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude must both be numbers")
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError("latitude must be within [-90, 90] and longitude within [-180, 180]")
+    return latitude, longitude
+
+
+def geohash_for(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+
+@event.listens_for(Property, 'before_insert')
+@event.listens_for(Property, 'before_update')
+def _set_geohash(mapper, connection, target):
+    target.geohash = geohash_for(target.latitude, target.longitude)
@@ -0,0 +1,100 @@
+# app/idempotency.py
+
+import hashlib
+from functools import wraps
+
+from flask import Response, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from app.cache import TTLCache
+
+_UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+# Responses to requests sent with an Idempotency-Key, per user and endpoint;
+# sized and timed by init_app. Entries are (body fingerprint, response),
+# with response None while the first request is still running.
+idempotency_keys = TTLCache()
+
+MAX_KEY_LENGTH = 255
+
+
+def init_app(app):
+    idempotency_keys.max_entries = app.config['IDEMPOTENCY_MAX_KEYS']
+    idempotency_keys.ttl = app.config['IDEMPOTENCY_KEY_TTL']
+
+
+def idempotent(view):
+    """Replay the stored response when a POST is retried with the same ``Idempotency-Key``.
+
+    The first request with a key runs the view and keeps its status and body
+    for ``IDEMPOTENCY_KEY_TTL`` seconds; retries get them back with an
+    ``Idempotent-Replayed`` header and never reach the view or the database.
+    Reusing a key with a different body is a 422, and a retry that arrives
+    while the first request is still running a 409. Server errors are not
+    kept, so they can be retried. Keys live in process memory; a retry that
+    lands on another worker runs again and relies on the view rejecting
+    duplicates. Must be applied below ``jwt_required``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if request.method != 'POST' or key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"message": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+
+        store_key = (get_jwt_identity()['id'], request.endpoint, key)
+        fingerprint = hashlib.sha1(request.get_data()).digest()
+        if not idempotency_keys.add(store_key, (fingerprint, None)):
+            stored = idempotency_keys.get(store_key)
+            if stored is not None:
+                stored_fingerprint, stored_response = stored
+                if stored_fingerprint != fingerprint:
+                    return jsonify({"message": "Idempotency-Key was already used with a different request"}), 422
+                if stored_response is None:
+                    return jsonify({"message": "A request with this Idempotency-Key is in progress"}), 409
+                status, body, mimetype = stored_response
+                return Response(body, status=status, mimetype=mimetype, headers={'Idempotent-Replayed': 'true'})
+            # Expired in between; claim it again
+            idempotency_keys.set(store_key, (fingerprint, None))
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency_keys.invalidate(store_key)
+            raise
+        if response.status_code >= 500:
+            idempotency_keys.invalidate(store_key)
+        else:
+            idempotency_keys.set(store_key, (fingerprint, (response.status_code, response.get_data(), response.mimetype)))
+        return response
+    return wrapper
+
+
+def insert_unique(session, model, values, unique, where):
+    """Insert one ``model`` row with ``values`` if ``where`` matches, unless it clashes on ``unique``.
+
+    A single INSERT .. SELECT, so a missing parent row (checked by ``where``)
+    and an existing duplicate both simply insert nothing. SQLite and
+    PostgreSQL use ON CONFLICT DO NOTHING; other engines run the insert in a
+    savepoint and treat an IntegrityError as the conflict. Returns the new
+    row's id, or None when nothing was inserted. Mapper events do not fire.
+    """
+    table = model.__table__
+    names = list(values)
+    source = select(*(literal(values[name], table.c[name].type) for name in names)).where(where)
+    connection = session.connection()
+    upsert = _UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(table).from_select(names, source).on_conflict_do_nothing(index_elements=unique)
+        return connection.execute(statement.returning(table.c.id)).scalar()
+    try:
+        with session.begin_nested():
+            result = session.connection().execute(insert(table).from_select(names, source))
+    except IntegrityError:
+        return None
+    return result.lastrowid if result.rowcount else None
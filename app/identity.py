@@ -0,0 +1,53 @@
+# app/identity.py
+
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, select
+
+from app import db
+from app.cache import TTLCache
+from app.models import User
+
+PROFILE_FIELDS = ('id', 'username', 'email', 'role')
+
+# Process-local cache of user profiles, sized and timed by init_app
+user_profiles = TTLCache()
+
+
+def init_app(app):
+    user_profiles.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+    user_profiles.ttl = app.config['USER_CACHE_TTL']
+
+
+def profile_claims(user):
+    return {name: getattr(user, name) for name in PROFILE_FIELDS}
+
+
+def get_user_profile(user_id):
+    """Return the profile dict for ``user_id``, or None if the user is gone."""
+    profile = user_profiles.get(user_id)
+    if profile is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.email, User.role).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        profile = dict(row._mapping)
+        user_profiles.set(user_id, profile)
+    return profile
+
+
+def current_user_profile():
+    """Return the current user's profile, straight from the JWT when it carries every field.
+
+    Tokens issued before the email claim was added fall back to the cache.
+    """
+    identity = get_jwt_identity()
+    if all(name in identity for name in PROFILE_FIELDS):
+        return identity
+    return get_user_profile(identity['id'])
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    user_profiles.invalidate(target.id)
@@ -0,0 +1,136 @@
+# app/instrumentation.py
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('app.requests')
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered request threads from one background thread.
+
+    Cheap enough to leave on: the sampler only walks ``sys._current_frames()``
+    every ``interval`` seconds, and stacks are kept only for requests that
+    turn out slow.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        samples = Counter()
+        with self._lock:
+            self._samples[thread_id] = samples
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return samples
+
+    def stop(self, thread_id):
+        with self._lock:
+            self._samples.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = dict(self._samples)
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in watched.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_globals.get('__name__')}:{frame.f_lineno}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    # The innermost frames are what tell slow requests apart
+                    samples[';'.join(reversed(stack[:12]))] += 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_time += elapsed
+        g.sql_statements[statement] += 1
+
+
+def _route():
+    return f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+
+
+def init_app(app):
+    """Count SQL statements per request and report them in ``Server-Timing`` and the request log.
+
+    A request that runs the same statement ``N_PLUS_ONE_THRESHOLD`` times or
+    more (typically lazy relationship loads in a loop) is logged as a
+    possible N+1. With ``PROFILE_SLOW_REQUEST_MS`` set, request threads are
+    sampled and the hottest stacks of slower requests are logged too.
+    Statements run while a streamed response is written are not counted.
+    """
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    with app.app_context():
+        engines = app.extensions['sqlalchemy'].engines
+    for engine in engines.values():
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    threshold = app.config['N_PLUS_ONE_THRESHOLD']
+    slow_ms = app.config['PROFILE_SLOW_REQUEST_MS']
+    profiler = SamplingProfiler(app.config['PROFILE_SAMPLE_INTERVAL_MS'] / 1000) if slow_ms else None
+
+    @app.before_request
+    def start_timing():
+        g.request_start = time.perf_counter()
+        g.sql_time = 0.0
+        g.sql_statements = Counter()
+        if profiler is not None:
+            g.profile_samples = profiler.start(threading.get_ident())
+
+    @app.after_request
+    def report_timing(response):
+        if 'request_start' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.request_start) * 1000
+        sql_ms = g.sql_time * 1000
+        sql_count = sum(g.sql_statements.values())
+        response.headers.add(
+            'Server-Timing', f'db;dur={sql_ms:.2f};desc="{sql_count} statements", app;dur={total_ms - sql_ms:.2f}'
+        )
+
+        route = _route()
+        logger.info(json.dumps({
+            'route': route, 'status': response.status_code, 'duration_ms': round(total_ms, 2),
+            'sql_count': sql_count, 'sql_ms': round(sql_ms, 2),
+        }))
+
+        repeated = [(statement, count) for statement, count in g.sql_statements.most_common(3) if count >= threshold]
+        for statement, count in repeated:
+            logger.warning("Possible N+1 in %s: %d executions of %s", route, count, ' '.join(statement.split())[:300])
+
+        if profiler is not None and total_ms >= slow_ms and g.profile_samples:
+            hottest = '\n'.join(f"{count:>5} {stack}" for stack, count in g.profile_samples.most_common(5))
+            logger.warning("Slow request %s took %.1f ms; hottest stacks:\n%s", route, total_ms, hottest)
+        return response
+
+    if profiler is not None:
+        @app.teardown_request
+        def stop_profiling(exc):
+            profiler.stop(threading.get_ident())
@@ -1,23 +1,24 @@
 from app import db
 from datetime import datetime
-from sqlalchemy.orm import backref
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), nullable=False, unique=True)
     email = db.Column(db.String(100), nullable=False, unique=True)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum('agent', 'property_owner', 'buyer', name='user_roles'), nullable=False)
+    # Properties are still deleted through the ORM so the search index and
+    # facet hooks see them; applications and wishlist rows go by ON DELETE CASCADE
     properties = db.relationship('Property', backref='owner', lazy=True, cascade="all, delete-orphan")
-    applications = db.relationship('Application', backref='applicant', lazy=True, cascade="all, delete-orphan")
-    favorites = db.relationship('Wishlist', backref='user', lazy=True, cascade="all, delete-orphan")
+    applications = db.relationship('Application', backref='applicant', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    favorites = db.relationship('Wishlist', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 class Property(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Float, nullable=False)
     location = db.Column(db.String(100), nullable=False)
-    listed_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    listed_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     is_approved = db.Column(db.Boolean, default=False)
 
     # New Enum column for property type
@@ -27,13 +28,35 @@ class Property(db.Model):
     agent_name = db.Column(db.String(50), nullable=False)
     agent_email = db.Column(db.String(100), nullable=False)
 
-    applications = db.relationship('Application', backref=backref('property', passive_deletes=True), lazy=True, cascade="all, delete-orphan")
-    favorites = db.relationship('Wishlist', backref=backref('property', passive_deletes=True), lazy=True, cascade="all, delete-orphan")
+    # Optional coordinates; geohash is derived from them for spatial lookups
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+
+    # Denormalized popularity, kept in step with application/wishlist rows by app/popularity.py
+    application_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    wishlist_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # The database deletes these with the property (ON DELETE CASCADE), so the ORM never loads them to do it
+    applications = db.relationship('Application', backref='property', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    favorites = db.relationship('Wishlist', backref='property', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+
+    # Composite indexes backing the keyset-paginated listing filters and sorts
+    __table_args__ = (
+        db.Index('ix_property_price_id', 'price', 'id'),
+        db.Index('ix_property_type_id', 'property_type', 'id'),
+        db.Index('ix_property_type_price_id', 'property_type', 'price', 'id'),
+        db.Index('ix_property_location_id', 'location', 'id'),
+        db.Index('ix_property_location_price_id', 'location', 'price', 'id'),
+        db.Index('ix_property_approved_id', 'is_approved', 'id'),
+        db.Index('ix_property_approved_price_id', 'is_approved', 'price', 'id'),
+        db.Index('ix_property_popular', 'application_count', 'wishlist_count', 'id'),
+    )
 
 class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    property_id = db.Column(db.Integer, db.ForeignKey('property.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id', ondelete='CASCADE'), nullable=False, index=True)
     status = db.Column(db.Enum('pending', 'approved', 'rejected', name='application_status'), nullable=False, default='pending')
     date_submitted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -41,8 +64,30 @@ class Application(db.Model):
     buyer_name = db.Column(db.String(50), nullable=False)
     buyer_email = db.Column(db.String(100), nullable=True)
 
+    # A buyer can apply to a property only once
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'property_id', name='uq_application_user_property'),
+    )
+
 
 class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    property_id = db.Column(db.Integer, db.ForeignKey('property.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'property_id', name='uq_wishlist_user_property'),
+    )
+
+
+class TableVersion(db.Model):
+    """Write counter per table, shared by every worker's response cache (app/cache.py)."""
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PropertyFacet(db.Model):
+    """Running count of properties per filter value; maintained by app/facets.py."""
+    facet = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,66 @@
+# app/pagination.py
+
+import base64
+import json
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+
+class PaginationError(ValueError):
+    """Raised when a client sends a bad cursor or limit."""
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError("Invalid cursor")
+    # Cursors only ever hold sort key values; anything else cannot be bound
+    if not all(isinstance(value, (int, float, str)) and not isinstance(value, bool) for value in values):
+        raise PaginationError("Invalid cursor")
+    return values
+
+
+def parse_limit(args):
+    default = current_app.config['DEFAULT_PAGE_SIZE']
+    maximum = current_app.config['MAX_PAGE_SIZE']
+    try:
+        limit = int(args.get('limit', default))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, maximum)
+
+
+def keyset_paginate(query, columns, descending, cursor, limit):
+    """Return one page of ``query`` ordered by ``columns`` and the cursor for the next page.
+
+    ``columns`` must end with a unique column (the primary key) so that the
+    ordering is total. The page is selected with a row-value comparison
+    against the last seen key, which lets the database seek straight into a
+    matching composite index instead of scanning past skipped rows.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key) for column in columns)
+    return rows, next_cursor
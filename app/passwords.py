@@ -0,0 +1,71 @@
+# app/passwords.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated thread pool.
+
+    Hashing is deliberately slow, so a login burst used to tie up every
+    request thread. Here at most ``workers`` hashes run at once and at most
+    ``queue_depth`` more wait; beyond that ``HasherBusy`` is raised at once
+    so the caller can answer 503 instead of stalling. The key-derivation
+    functions release the GIL, so other requests keep running meanwhile.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self._method_prefix = None
+        self._executor = None
+        self._slots = None
+        self.rejected = 0
+        self.rehashed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self._method_prefix = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether ``pwhash`` was made with a different method or cost than configured."""
+        if self._method_prefix is None:
+            # werkzeug fills in default costs (e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'),
+            # so compare against what it actually writes
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._method_prefix
+
+    def stats(self):
+        return {'rejected': self.rejected, 'rehashed': self.rehashed}
+
+
+password_hasher = PasswordHasher()
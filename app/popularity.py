@@ -0,0 +1,83 @@
+# app/popularity.py
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, or_, select, update
+
+from app import db
+from app.models import Application, Property, User, Wishlist
+
+# Counter column on property for each child table
+COUNTERS = ((Application, 'application_count'), (Wishlist, 'wishlist_count'))
+
+property_table = Property.__table__
+
+
+def _adjust(connection, property_id, column, change):
+    connection.execute(
+        update(property_table)
+        .where(property_table.c.id == property_id)
+        .values({column: property_table.c[column] + change})
+    )
+
+
+def count_row(connection, model, property_id):
+    """Count a ``model`` row inserted without going through the ORM."""
+    _adjust(connection, property_id, dict(COUNTERS)[model], 1)
+
+
+# Run inside the flush, so a counter commits or rolls back with its row
+def _counted(model, column):
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        _adjust(connection, target.property_id, column, 1)
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        _adjust(connection, target.property_id, column, -1)
+
+
+for _model, _column in COUNTERS:
+    _counted(_model, _column)
+
+
+@event.listens_for(User, 'before_delete')
+def _user_deleted(mapper, connection, target):
+    # The user's applications and wishlist rows go by ON DELETE CASCADE, out
+    # of sight of the hooks above; each user counts at most once per property
+    for model, column in COUNTERS:
+        table = model.__table__
+        connection.execute(
+            update(property_table)
+            .where(property_table.c.id.in_(select(table.c.property_id).where(table.c.user_id == target.id)))
+            .values({column: property_table.c[column] - 1})
+        )
+
+
+def _actual(model):
+    table = model.__table__
+    return (
+        select(func.count()).select_from(table)
+        .where(table.c.property_id == property_table.c.id)
+        .scalar_subquery()
+    )
+
+
+def recount_popularity(connection):
+    """Recompute the counters from the child tables in one UPDATE; returns how many properties changed."""
+    actual = {column: _actual(model) for model, column in COUNTERS}
+    result = connection.execute(
+        update(property_table)
+        .where(or_(*(property_table.c[column] != count for column, count in actual.items())))
+        .values(actual)
+    )
+    return result.rowcount
+
+
+@click.command('repair-popularity')
+@with_appcontext
+def repair_popularity_command():
+    """Recompute every property's application and wishlist counts."""
+    repaired = recount_popularity(db.session.connection())
+    db.session.commit()
+    click.echo(f"Repaired counters on {repaired} properties.")
@@ -1,26 +1,34 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, request, jsonify
 from app import db
 from app.models import User, Property, Application, Wishlist
-from app.schemas import UserSchema, PropertySchema, ApplicationSchema, WishlistSchema
+from app import schemas
+from app.filters import filter_properties, filter_applications, property_sort, parse_float
+from app.pagination import PaginationError, parse_limit, keyset_paginate, encode_cursor, decode_cursor
+from app.search import search_properties, unindex_properties
+from app.cache import cached_response, response_cache
+from app.export import EXPORT_FORMATS, stream_export
+from app.bulk import BulkImportError, parse_upload, import_properties
+from app.identity import current_user_profile, profile_claims, user_profiles
+from app.passwords import HasherBusy, password_hasher
+from app.serializers import json_response, serializer_for
+from app.facets import facet_counts, uncount_properties
+from app.geo import haversine_km, parse_coordinates, radius_box, within_box
+from app.similar import forget_properties, remember_wish, similar_index
+from app.events import TooManySubscribers, event_broker
+from app.idempotency import idempotent, insert_unique, idempotency_keys
+from app.popularity import count_row
+from sqlalchemy import case, delete, func, select, update
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 def create_jwt_for_user(user):
-    additional_claims = {
-        "id": user.id,
-        "username": user.username,
-        "role": user.role,
-        "email": user.email  # Make sure this line is correctly fetching the email from the user object
-    }
-    print(additional_claims)
-    return create_access_token(identity=additional_claims)
+    # The identity carries everything the routes need, so they never look the user up
+    return create_access_token(identity=profile_claims(user))
 
 main = Blueprint('main', __name__)
 
-user_schema = UserSchema()
-property_schema = PropertySchema()
-application_schema = ApplicationSchema()
-wishlist_schema = WishlistSchema()
+# Schemas and their compiled serializers are built on first use (see app/schemas.py)
 
 # User Registration
 @main.route('/register', methods=['POST'])
@@ -28,17 +36,21 @@ def register():
     data = request.get_json()
     username = data.get('username')
     email = data.get('email')
-    password = generate_password_hash(data.get('password'))
     role = data.get('role')
 
     if User.query.filter_by(email=email).first():
         return jsonify({"message": "User already exists"}), 400
 
+    try:
+        password = password_hasher.hash(data.get('password'))
+    except HasherBusy:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {'Retry-After': '1'}
+
     new_user = User(username=username, email=email, password=password, role=role)
     db.session.add(new_user)
     db.session.commit()
 
-    return user_schema.jsonify(new_user), 201
+    return schemas.shared('UserSchema').jsonify(new_user), 201
 
 @main.route('/login', methods=['POST'])
 def login():
@@ -47,31 +59,61 @@ def login():
     password = data.get('password')
 
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password, password):
-        return jsonify({"message": "Invalid credentials"}), 401
-
-    access_token = create_access_token(identity={'id': user.id, 'username': user.username, 'role': user.role})
+    try:
+        if not user or not password_hasher.verify(user.password, password):
+            return jsonify({"message": "Invalid credentials"}), 401
+
+        # Upgrade hashes made with an older method or cost while we have the password
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
+            password_hasher.rehashed += 1
+    except HasherBusy:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {'Retry-After': '1'}
+
+    access_token = create_jwt_for_user(user)
     return jsonify({
         "access_token": access_token,
         "user_role": user.role  # Return the user's role (agent/buyer)
     }), 200
 
 # Property Management (List, Create, Update, Delete)
+def wants_wishlisted():
+    return 'is_wishlisted' in request.args.get('include', '').split(',')
+
+# Application events go only to the applicant and the listing's agent
+def publish_application(event_type, application, agent_id):
+    event_broker.publish(
+        event_type,
+        {name: application[name] for name in ('id', 'property_id', 'status')},
+        users=(application['user_id'], agent_id),
+    )
+
+# The popularity counters change with every application and wishlist write
+def popularity_tables():
+    return ('application', 'wishlist') if request.args.get('sort') == 'popular' else ()
+
+
 @main.route('/properties', methods=['GET', 'POST'])
 @jwt_required()
+@cached_response('property', per_user=wants_wishlisted, user_tables=('wishlist',), extra_tables=popularity_tables)
 def manage_properties():
-    current_user = get_jwt_identity()  # Get current user's ID from the JWT token
-    
-    # Fetch current user details from the User table
-    user = User.query.get(current_user['id'])
-    
     if request.method == 'POST':
+        # Current user details come from the JWT, or the profile cache for older tokens
+        user = current_user_profile()
+        if user is None:
+            return jsonify({"message": "User not found"}), 404
+
         data = request.get_json()
         title = data.get('title')
         description = data.get('description')
         price = data.get('price')
         location = data.get('location')
         property_type = data.get('property_type')  # Get the property type from the request
+        try:
+            latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
         # Create new property and populate agent details
         new_property = Property(
@@ -79,20 +121,208 @@ def manage_properties():
             description=description,
             price=price,
             location=location,
-            listed_by=user.id,
+            listed_by=user['id'],
             property_type=property_type,  # Add property type to the new property
-            agent_name=user.username,     # Populate agent name
-            agent_email=user.email        # Populate agent email
+            agent_name=user['username'],  # Populate agent name
+            agent_email=user['email'],    # Populate agent email
+            latitude=latitude,
+            longitude=longitude
         )
 
         db.session.add(new_property)
         db.session.commit()
+        response_cache.bump('property')
+        event_broker.publish('property.created', {'ids': [new_property.id]})
+
+        return schemas.shared('PropertySchema').jsonify(new_property), 201
+
+    # Fetch one page of properties, filtered and sorted by the query string
+    try:
+        columns, descending = property_sort(request.args)
+        rows = serializer_for(schemas.PropertySchema, request.args.get('fields'))
+        query = filter_properties(Property.query, request.args).with_entities(*rows.with_columns(*columns))
+        properties, next_cursor = keyset_paginate(
+            query, columns, descending, request.args.get('cursor'), parse_limit(request.args)
+        )
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    results = rows.dump(properties)
+
+    # Opt-in wishlist flag, computed with one lookup for the whole page
+    if wants_wishlisted():
+        page_ids = [property.id for property in properties]
+        wishlisted = set(db.session.scalars(
+            select(Wishlist.property_id)
+            .where(Wishlist.user_id == get_jwt_identity()['id'], Wishlist.property_id.in_(page_ids))
+        ))
+        for result, property_id in zip(results, page_ids):
+            result['is_wishlisted'] = property_id in wishlisted
+
+    response = json_response(results)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+# Bulk property import from a JSON array, NDJSON or CSV upload
+@main.route('/properties/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import_properties():
+    current_user = get_jwt_identity()
+
+    # Ensure the current user is an agent
+    if current_user['role'] != 'agent':
+        return jsonify({"message": "Unauthorized: Only agents can import properties"}), 403
+
+    try:
+        rows = parse_upload(request)
+    except BulkImportError as e:
+        return jsonify({"message": str(e)}), 400
 
-        return property_schema.jsonify(new_property), 201
+    agent = current_user_profile()
+    if agent is None:
+        return jsonify({"message": "User not found"}), 404
+
+    ids, errors = import_properties(rows, agent)
+    if ids:
+        response_cache.bump('property')
+        event_broker.publish('property.created', {'ids': ids})
+
+    return jsonify({"created": len(ids), "ids": ids, "errors": errors}), 201 if ids else 400
+
+# Full-text search over property title, description and location
+@main.route('/properties/search', methods=['GET'])
+@jwt_required()
+@cached_response('property')
+def search():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"message": "q is required"}), 400
+
+    try:
+        limit = parse_limit(request.args)
+        cursor = request.args.get('cursor')
+        offset = decode_cursor(cursor, 1)[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise PaginationError("Invalid cursor")
+        rows = serializer_for(schemas.PropertySchema, request.args.get('fields'))
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    properties = search_properties(q, offset, limit + 1, rows.columns)
+
+    response = json_response(rows.dump(properties[:limit]))
+    if len(properties) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor([offset + limit])
+    return response, 200
+
+# Listing counts per property type, location and price bucket, read from
+# the incrementally maintained property_facet table
+@main.route('/properties/facets', methods=['GET'])
+@jwt_required()
+@cached_response('property')
+def property_facets():
+    return jsonify(facet_counts()), 200
+
+# Properties within a radius (km) of a point, nearest first
+@main.route('/properties/nearby', methods=['GET'])
+@jwt_required()
+@cached_response('property')
+def nearby_properties():
+    try:
+        lat, lon = parse_coordinates(parse_float(request.args, 'lat'), parse_float(request.args, 'lon'))
+        if lat is None:
+            raise PaginationError("lat and lon are required")
+        radius = parse_float(request.args, 'radius')
+        radius = 5.0 if radius is None else radius
+        if not 0 < radius <= current_app.config['MAX_SEARCH_RADIUS_KM']:
+            raise PaginationError(f"radius must be within (0, {current_app.config['MAX_SEARCH_RADIUS_KM']}] km")
+        limit = parse_limit(request.args)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 2) if cursor else None
+        rows = serializer_for(schemas.PropertySchema, request.args.get('fields'))
+    except (PaginationError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    # The geohash index prunes to the circle's bounding box; haversine does the rest
+    query = within_box(
+        Property.query.with_entities(*rows.with_columns(Property.id, Property.latitude, Property.longitude)),
+        *radius_box(lat, lon, radius)
+    )
+    candidates = []
+    for row in query:
+        distance = haversine_km(lat, lon, row.latitude, row.longitude)
+        if distance <= radius and (after is None or (distance, row.id) > tuple(after)):
+            candidates.append((distance, row.id, row))
+    candidates.sort(key=lambda candidate: candidate[:2])
+    page = candidates[:limit]
+
+    results = rows.dump(row for _, _, row in page)
+    for result, (distance, _, _) in zip(results, page):
+        result['distance_km'] = round(distance, 3)
+
+    response = json_response(results)
+    if len(candidates) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(page[-1][:2])
+    return response, 200
+
+
+# Properties inside a latitude/longitude bounding box
+@main.route('/properties/within', methods=['GET'])
+@jwt_required()
+@cached_response('property')
+def properties_within():
+    try:
+        min_lat, min_lon = parse_coordinates(parse_float(request.args, 'min_lat'), parse_float(request.args, 'min_lon'))
+        max_lat, max_lon = parse_coordinates(parse_float(request.args, 'max_lat'), parse_float(request.args, 'max_lon'))
+        if min_lat is None or max_lat is None or min_lat > max_lat or min_lon > max_lon:
+            raise PaginationError("min_lat, min_lon, max_lat and max_lon are required and must form a box")
+        rows = serializer_for(schemas.PropertySchema, request.args.get('fields'))
+        query = within_box(Property.query.with_entities(*rows.with_columns(Property.id)), min_lat, min_lon, max_lat, max_lon)
+        properties, next_cursor = keyset_paginate(
+            query, (Property.id,), False, request.args.get('cursor'), parse_limit(request.args)
+        )
+    except (PaginationError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    response = json_response(rows.dump(properties))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+# Listings closest to this one in price, type and location, pulled closer by
+# shared wishlisters; served from the in-process index in app/similar.py
+@main.route('/properties/<int:id>/similar', methods=['GET'])
+@jwt_required()
+@cached_response('property', 'wishlist')
+def similar_properties(id):
+    try:
+        try:
+            k = int(request.args.get('k', 10))
+        except ValueError:
+            raise PaginationError("k must be an integer")
+        if not 1 <= k <= current_app.config['SIMILAR_MAX_K']:
+            raise PaginationError(f"k must be between 1 and {current_app.config['SIMILAR_MAX_K']}")
+        rows = serializer_for(schemas.PropertySchema, request.args.get('fields'))
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    similar_index.ensure(db.session)
+    if id not in similar_index:
+        return jsonify({"message": "Property not found"}), 404
+
+    ranked = similar_index.similar(id, k)
+    found = {
+        row.id: row for row in Property.query.with_entities(*rows.with_columns(Property.id))
+        .filter(Property.id.in_([property_id for property_id, _ in ranked]))
+    }
+    page = [(found[property_id], distance) for property_id, distance in ranked if property_id in found]
+
+    results = rows.dump(row for row, _ in page)
+    for result, (_, distance) in zip(results, page):
+        result['distance'] = round(distance, 4)
+    return json_response(results), 200
 
-    # Fetch all properties
-    properties = Property.query.all()
-    return jsonify(property_schema.dump(properties, many=True)), 200
 @main.route('/properties/<int:id>', methods=['PUT', 'DELETE'])
 @jwt_required()
 def modify_property(id):
@@ -110,10 +340,18 @@ def modify_property(id):
         property.price = data.get('price', property.price)
         property.location = data.get('location', property.location)
         property.property_type = data.get('property_type', property.property_type)  # Update property type if provided
+        try:
+            property.latitude, property.longitude = parse_coordinates(
+                data.get('latitude', property.latitude), data.get('longitude', property.longitude)
+            )
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
         db.session.commit()
+        response_cache.bump('property')
+        event_broker.publish('property.updated', {'ids': [property.id]})
 
-        return property_schema.jsonify(property), 200
+        return schemas.shared('PropertySchema').jsonify(property), 200
 
     if request.method == 'DELETE':
         if property.listed_by != current_user['id']:
@@ -121,43 +359,105 @@ def modify_property(id):
 
         db.session.delete(property)
         db.session.commit()
+        response_cache.bump('property', 'application', 'wishlist')
+        event_broker.publish('property.deleted', {'ids': [id]})
 
         return jsonify({"message": "Property deleted"}), 200
 
+# Delete many of the agent's own listings at once; their applications and
+# wishlist entries go with them through ON DELETE CASCADE
+@main.route('/properties/batch', methods=['DELETE'])
+@jwt_required()
+def batch_delete_properties():
+    current_user = get_jwt_identity()
+
+    if current_user['role'] != 'agent':
+        return jsonify({"message": "Unauthorized: Only agents can delete properties."}), 403
+
+    data = request.get_json() or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({"message": "ids must be a non-empty list of property ids"}), 400
+    if len(ids) > current_app.config['BATCH_DELETE_MAX_IDS']:
+        return jsonify({"message": f"At most {current_app.config['BATCH_DELETE_MAX_IDS']} ids per request"}), 400
+
+    # Check ownership and collect what the facet counts need with a single query
+    rows = db.session.execute(
+        select(Property.id, Property.property_type, Property.location, Property.price)
+        .where(Property.id.in_(ids), Property.listed_by == current_user['id'])
+    ).mappings().all()
+    missing = sorted(set(ids) - {row['id'] for row in rows})
+    if missing:
+        return jsonify({"message": "Unauthorized: You do not own these properties.", "ids": missing}), 403
+
+    connection = db.session.connection()
+    uncount_properties(connection, rows)
+    unindex_properties(connection, ids)
+    forget_properties(db.session, ids)
+    result = db.session.execute(
+        delete(Property).where(Property.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    response_cache.bump('property', 'application', 'wishlist')
+    event_broker.publish('property.deleted', {'ids': ids})
+
+    return jsonify({"deleted": result.rowcount}), 200
+
 @main.route('/applications', methods=['POST', 'GET'])
 @jwt_required()
+@idempotent
 def manage_applications():
     current_user = get_jwt_identity()
-    #print(current_user)
-    print(current_user.get('email'))
-    user = User.query.get(current_user['id'])
 
     if request.method == 'POST':
+        user = current_user_profile()
+        if user is None:
+            return jsonify({"message": "User not found"}), 404
+
         data = request.get_json()
         property_id = data.get('property_id')
 
-        # Check if the property exists
-        property = Property.query.get_or_404(property_id)
-
-        # Create a new application, handling missing email
-        new_application = Application(
-            user_id=current_user['id'],
-            property_id=property_id,
-            buyer_name=current_user['username'],  # Username is assumed to be always present
-            buyer_email=user.email  # Fallback if 'email' is not in JWT
+        # Insert only if the property exists and this buyer has not applied
+        # yet, in one statement; buyer details are copied from the profile
+        values = {
+            'user_id': current_user['id'],
+            'property_id': property_id,
+            'status': 'pending',
+            'date_submitted': datetime.utcnow(),
+            'buyer_name': user['username'],
+            'buyer_email': user['email'],
+        }
+        values['id'] = insert_unique(
+            db.session, Application, values, ['user_id', 'property_id'], Property.id == property_id
         )
-
-        db.session.add(new_application)
+        if values['id'] is None:
+            db.session.rollback()
+            if db.session.get(Property, property_id) is None:
+                abort(404)
+            return jsonify({"message": "You have already applied for this property"}), 409
+        count_row(db.session.connection(), Application, property_id)
+        agent_id = db.session.scalar(select(Property.listed_by).where(Property.id == property_id))
         db.session.commit()
+        response_cache.bump('application')
+
+        application = schemas.shared('ApplicationSchema').dump(values)
+        publish_application('application.submitted', application, agent_id)
 
-        return application_schema.jsonify(new_application), 201
+        return jsonify(application), 201
 
     # Fetch all applications made by the current user
-    applications = Application.query.filter_by(user_id=current_user['id']).all()
-    return jsonify(application_schema.dump(applications, many=True)), 200
+    try:
+        rows = serializer_for(schemas.ApplicationSchema, request.args.get('fields'))
+        query = filter_applications(Application.query.filter_by(user_id=current_user['id']), request.args)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    applications = query.with_entities(*rows.columns)
+    return json_response(rows.dump(applications)), 200
 # Wishlist Management (Add, Remove)
 @main.route('/wishlist', methods=['POST', 'DELETE'])
 @jwt_required()
+@idempotent
 def manage_wishlist():
     current_user = get_jwt_identity()
 
@@ -165,18 +465,25 @@ def manage_wishlist():
         data = request.get_json()
         property_id = data.get('property_id')
 
-        # Check if the property exists
-        property = Property.query.get_or_404(property_id)
-
-        new_wishlist_item = Wishlist(
-            user_id=current_user['id'],
-            property_id=property_id
+        # Insert only if the property exists and is not wishlisted yet, in one statement
+        values = {'user_id': current_user['id'], 'property_id': property_id}
+        values['id'] = insert_unique(
+            db.session, Wishlist, values, ['user_id', 'property_id'], Property.id == property_id
         )
-
-        db.session.add(new_wishlist_item)
+        property = db.session.get(Property, property_id)
+        if values['id'] is None:
+            db.session.rollback()
+            if property is None:
+                abort(404)
+            return jsonify({"message": "Property is already in your wishlist"}), 409
+        count_row(db.session.connection(), Wishlist, property_id)
+        remember_wish(db.session, current_user['id'], property_id)
+        # Serialized before the commit expires the property
+        wishlist_item = schemas.shared('WishlistSchema').dump({**values, 'property': property})
         db.session.commit()
+        response_cache.bump('wishlist')
 
-        return wishlist_schema.jsonify(new_wishlist_item), 201
+        return jsonify(wishlist_item), 201
 
     if request.method == 'DELETE':
         data = request.get_json()
@@ -188,12 +495,14 @@ def manage_wishlist():
 
         db.session.delete(wishlist_item)
         db.session.commit()
+        response_cache.bump('wishlist')
 
         return jsonify({"message": "Wishlist item removed"}), 200
 
 # View All Applications for Agent's Properties
 @main.route('/agent/applications', methods=['GET'])
 @jwt_required()
+@cached_response('application', 'property', per_user=True)
 def view_agent_applications():
     current_user = get_jwt_identity()
 
@@ -201,16 +510,83 @@ def view_agent_applications():
     if current_user['role'] != 'agent':
         return jsonify({"message": "Unauthorized: Only agents can view applications for their properties"}), 403
 
-    # Find properties listed by the agent
-    agent_properties = Property.query.filter_by(listed_by=current_user['id']).all()
+    # Fetch one page of applications for the agent's properties with a single join
+    try:
+        rows = serializer_for(schemas.ApplicationSchema, request.args.get('fields'))
+        query = (
+            Application.query
+            .join(Property, Property.id == Application.property_id)
+            .filter(Property.listed_by == current_user['id'])
+            .with_entities(*rows.with_columns(Application.id))
+        )
+        query = filter_applications(query, request.args)
+        applications, next_cursor = keyset_paginate(
+            query, (Application.id,), False, request.args.get('cursor'), parse_limit(request.args)
+        )
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    response = json_response(rows.dump(applications))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
-    # Get property IDs for properties listed by the agent
-    property_ids = [property.id for property in agent_properties]
 
-    # Fetch all applications for these properties
-    applications = Application.query.filter(Application.property_id.in_(property_ids)).all()
+# Per-property application and wishlist counts for the agent's listings
+@main.route('/agent/dashboard', methods=['GET'])
+@jwt_required()
+@cached_response('application', 'property', 'wishlist', per_user=True)
+def agent_dashboard():
+    current_user = get_jwt_identity()
+
+    # Ensure the current user is an agent
+    if current_user['role'] != 'agent':
+        return jsonify({"message": "Unauthorized: Only agents can view the dashboard"}), 403
+
+    # Counts are aggregated in the database, restricted to the agent's properties
+    application_counts = (
+        select(
+            Application.property_id,
+            func.sum(case((Application.status == 'pending', 1), else_=0)).label('pending'),
+            func.sum(case((Application.status == 'approved', 1), else_=0)).label('approved'),
+            func.sum(case((Application.status == 'rejected', 1), else_=0)).label('rejected'),
+        )
+        .join(Property, Property.id == Application.property_id)
+        .where(Property.listed_by == current_user['id'])
+        .group_by(Application.property_id)
+        .subquery()
+    )
+    wishlist_counts = (
+        select(Wishlist.property_id, func.count().label('wishlisted'))
+        .join(Property, Property.id == Wishlist.property_id)
+        .where(Property.listed_by == current_user['id'])
+        .group_by(Wishlist.property_id)
+        .subquery()
+    )
+    query = (
+        db.session.query(
+            Property.id.label('id'),
+            Property.title,
+            func.coalesce(application_counts.c.pending, 0).label('pending'),
+            func.coalesce(application_counts.c.approved, 0).label('approved'),
+            func.coalesce(application_counts.c.rejected, 0).label('rejected'),
+            func.coalesce(wishlist_counts.c.wishlisted, 0).label('wishlisted'),
+        )
+        .outerjoin(application_counts, application_counts.c.property_id == Property.id)
+        .outerjoin(wishlist_counts, wishlist_counts.c.property_id == Property.id)
+        .filter(Property.listed_by == current_user['id'])
+    )
+    try:
+        rows, next_cursor = keyset_paginate(
+            query, (Property.id,), False, request.args.get('cursor'), parse_limit(request.args)
+        )
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
 
-    return jsonify(application_schema.dump(applications, many=True)), 200
+    response = jsonify([dict(row._mapping) for row in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 
 @main.route('/applications/<int:application_id>/accept', methods=['PUT'])
@@ -233,8 +609,12 @@ def accept_application(application_id):
     # Update the application status to 'approved'
     application.status = 'approved'
     db.session.commit()
+    response_cache.bump('application')
+
+    result = schemas.shared('ApplicationSchema').dump(application)
+    publish_application('application.updated', result, current_user['id'])
 
-    return application_schema.jsonify(application), 200
+    return jsonify(result), 200
 
 
 @main.route('/applications/<int:application_id>/reject', methods=['PUT'])
@@ -257,8 +637,74 @@ def reject_application(application_id):
     # Update the application status to 'rejected'
     application.status = 'rejected'
     db.session.commit()
+    response_cache.bump('application')
+
+    result = schemas.shared('ApplicationSchema').dump(application)
+    publish_application('application.updated', result, current_user['id'])
+
+    return jsonify(result), 200
+
+
+# Accept or reject many applications at once
+@main.route('/applications/batch', methods=['PUT'])
+@jwt_required()
+def batch_update_applications():
+    current_user = get_jwt_identity()
+
+    # Ensure the current user is an agent
+    if current_user['role'] != 'agent':
+        return jsonify({"message": "Unauthorized: Only agents can update applications."}), 403
+
+    data = request.get_json() or {}
+    owned = (
+        select(Application.id, Application.property_id, Application.user_id)
+        .join(Property, Property.id == Application.property_id)
+        .where(Property.listed_by == current_user['id'])
+    )
+
+    # Approve one application and reject every other one for the same property
+    if 'approve' in data:
+        approve = data['approve']
+        if not isinstance(approve, int) or isinstance(approve, bool):
+            return jsonify({"message": "approve must be an application id"}), 400
+        # Every application for the approved one's property, in one query
+        rows = db.session.execute(owned.where(
+            Application.property_id == select(Application.property_id).where(Application.id == approve).scalar_subquery()
+        )).all()
+        if not any(row.id == approve for row in rows):
+            return jsonify({"message": "Application not found for your properties."}), 404
+
+        statuses = {row.id: 'approved' if row.id == approve else 'rejected' for row in rows}
+        statement = (
+            update(Application)
+            .where(Application.property_id == rows[0].property_id)
+            .values(status=case((Application.id == approve, 'approved'), else_='rejected'))
+        )
+    else:
+        ids = data.get('ids')
+        status = data.get('status')
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({"message": "ids must be a non-empty list of application ids"}), 400
+        if status not in ('approved', 'rejected'):
+            return jsonify({"message": "status must be approved or rejected"}), 400
+
+        # Check ownership of every application with a single join
+        rows = db.session.execute(owned.where(Application.id.in_(ids))).all()
+        missing = sorted(set(ids) - {row.id for row in rows})
+        if missing:
+            return jsonify({"message": "Unauthorized: You do not own these applications.", "ids": missing}), 403
+
+        statuses = {row.id: status for row in rows}
+        statement = update(Application).where(Application.id.in_(ids)).values(status=status)
+
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    response_cache.bump('application')
 
-    return application_schema.jsonify(application), 200
+    for row in rows:
+        publish_application('application.updated', {**row._asdict(), 'status': statuses[row.id]}, current_user['id'])
+
+    return jsonify({"updated": result.rowcount}), 200
 
 
 # Function to delete an application
@@ -277,37 +723,96 @@ def delete_application(application_id):
     # Delete the application
     db.session.delete(application)
     db.session.commit()
+    response_cache.bump('application')
 
     return jsonify({"message": "Application deleted successfully."}), 200
 
 
-# Get Wishlist Items
+# Get wishlist items for the logged-in user, each with its property embedded
 @main.route('/wishlist', methods=['GET'])
 @jwt_required()
-def get_wishlist_items():
-    current_user = get_jwt_identity()  # Get the current logged-in user
-    user_id = current_user['id']
+@cached_response('wishlist', 'property', per_user=True)
+def get_wishlist():
+    current_user = get_jwt_identity()  # Get the logged-in user
 
-    # Query wishlist items for the logged-in user
-    wishlist_items = Wishlist.query.filter_by(user_id=user_id).all()
+    # Wishlist rows and their properties come back from a single join
+    try:
+        rows = serializer_for(schemas.WishlistSchema, request.args.get('fields'))
+        query = (
+            Wishlist.query
+            .join(Wishlist.property)
+            .filter(Wishlist.user_id == current_user['id'])
+            .with_entities(*rows.with_columns(Wishlist.id))
+        )
+        wishlist_items, next_cursor = keyset_paginate(
+            query, (Wishlist.id,), False, request.args.get('cursor'), parse_limit(request.args)
+        )
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
 
-    if not wishlist_items:
-        return jsonify({"message": "No items found in the wishlist."}), 200
+    response = json_response(rows.dump(wishlist_items))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
-    return wishlist_schema.jsonify(wishlist_items), 200
 
+# Streaming exports for reporting jobs
+@main.route('/export/properties', methods=['GET'])
+@jwt_required()
+def export_properties():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
 
-# Get all wishlist items for the logged-in user
-@main.route('/wishlist', methods=['GET'])
+    query = select(Property).order_by(Property.id)
+    return stream_export(query, serializer_for(schemas.PropertySchema), fmt, 'properties')
+
+
+@main.route('/export/agent/applications', methods=['GET'])
 @jwt_required()
-def get_wishlist():
-    current_user = get_jwt_identity()  # Get the logged-in user
+def export_agent_applications():
+    current_user = get_jwt_identity()
+
+    # Ensure the current user is an agent
+    if current_user['role'] != 'agent':
+        return jsonify({"message": "Unauthorized: Only agents can export applications for their properties"}), 403
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    query = (
+        select(Application)
+        .join(Property, Property.id == Application.property_id)
+        .where(Property.listed_by == current_user['id'])
+        .order_by(Application.id)
+    )
+    return stream_export(query, serializer_for(schemas.ApplicationSchema), fmt, 'applications')
 
-    # Query the wishlist for the current user
-    wishlist_items = Wishlist.query.filter_by(user_id=current_user['id']).all()
 
-    # Fetch the properties that are in the wishlist
-    property_ids = [item.property_id for item in wishlist_items]
-    properties_in_wishlist = Property.query.filter(Property.id.in_(property_ids)).all()
+# Process-local cache statistics
+@main.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "user_cache": user_profiles.stats(),
+        "password_hashing": password_hasher.stats(),
+        "events": event_broker.stats(),
+        "idempotency_keys": idempotency_keys.stats(),
+    }), 200
+
+# Server-Sent Events feed of listing and application changes, so pages can
+# refresh what changed instead of polling. EventSource cannot set headers,
+# so the token may also be passed as ?jwt=
+@main.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def events():
+    current_user = get_jwt_identity()
+    types = [prefix for prefix in request.args.get('types', '').split(',') if prefix]
+
+    try:
+        stream = event_broker.subscribe(current_user['id'], request.headers.get('Last-Event-ID'), types)
+    except TooManySubscribers:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {'Retry-After': '5'}
 
-    return property_schema.jsonify(properties_in_wishlist, many=True), 200
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,28 +1,69 @@
 # app/schemas.py
 
+from functools import lru_cache
+
+from marshmallow import EXCLUDE
+from marshmallow.validate import Range
 from app import ma
 from app.models import User, Property, Application, Wishlist
 
-class UserSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = User
-        load_instance = True
-
-class PropertySchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Property
-        load_instance = True
-
-class ApplicationSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Application
-        load_instance = True
-    # Optionally, you can add custom fields or validation here if needed
-    property_id=ma.auto_field()
-    user_id=ma.auto_field()
-    
-
-class WishlistSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Wishlist
-        load_instance = True
+SCHEMA_NAMES = ('UserSchema', 'PropertySchema', 'PropertyImportSchema', 'ApplicationSchema', 'WishlistSchema')
+
+# Auto schemas introspect their models (and configure every mapper) when the
+# class is created. They are built on first attribute access instead, so
+# importing this module, booting a worker or running a CLI command is cheap.
+@lru_cache(maxsize=None)
+def _build():
+    class UserSchema(ma.SQLAlchemyAutoSchema):
+        class Meta:
+            model = User
+            load_instance = True
+
+    class PropertySchema(ma.SQLAlchemyAutoSchema):
+        class Meta:
+            model = Property
+            load_instance = True
+            exclude = ('geohash', 'application_count', 'wishlist_count')
+
+    class PropertyImportSchema(ma.SQLAlchemyAutoSchema):
+        # Validates rows for bulk import; agent details and approval are set server-side
+        class Meta:
+            model = Property
+            load_instance = False
+            exclude = ('id', 'is_approved', 'agent_name', 'agent_email', 'geohash', 'application_count', 'wishlist_count')
+            unknown = EXCLUDE
+        latitude = ma.auto_field(validate=Range(-90, 90))
+        longitude = ma.auto_field(validate=Range(-180, 180))
+
+    class ApplicationSchema(ma.SQLAlchemyAutoSchema):
+        class Meta:
+            model = Application
+            load_instance = True
+        # Optionally, you can add custom fields or validation here if needed
+        property_id=ma.auto_field()
+        user_id=ma.auto_field()
+
+
+    class WishlistSchema(ma.SQLAlchemyAutoSchema):
+        class Meta:
+            model = Wishlist
+            load_instance = True
+        property_id = ma.auto_field()
+        # Embedded so the wishlist page needs no second request for the listings
+        property = ma.Nested(PropertySchema)
+
+    return {schema.__name__: schema for schema in (
+        UserSchema, PropertySchema, PropertyImportSchema, ApplicationSchema, WishlistSchema
+    )}
+
+
+def __getattr__(name):
+    if name in SCHEMA_NAMES:
+        return _build()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=None)
+def shared(name):
+    """Return one reusable instance of the schema class called ``name``."""
+    return _build()[name]()
@@ -0,0 +1,139 @@
+# app/search.py
+
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DDL, and_, column, event, func, inspect, literal_column, or_, table, text
+
+from app import db
+from app.models import Property
+
+SEARCH_COLUMNS = ('title', 'description', 'location')
+
+# Standalone FTS5 table keyed by rowid == property.id. Kept in sync from the
+# mapper events below rather than triggers so the ORM stays the single writer.
+CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS property_fts "
+    "USING fts5(title, description, location, tokenize='unicode61 remove_diacritics 2')"
+)
+
+property_fts = table('property_fts', column('rowid'), *(column(name) for name in SEARCH_COLUMNS))
+
+# create_all() builds the FTS table alongside property on SQLite
+event.listen(Property.__table__, 'after_create', DDL(CREATE_FTS_TABLE).execute_if(dialect='sqlite'))
+
+
+def _uses_fts(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+def _index_row(connection, target):
+    connection.execute(
+        text("INSERT INTO property_fts (rowid, title, description, location) "
+             "VALUES (:id, :title, :description, :location)"),
+        {'id': target.id, 'title': target.title,
+         'description': target.description, 'location': target.location},
+    )
+
+
+def _unindex_row(connection, property_id):
+    connection.execute(text("DELETE FROM property_fts WHERE rowid = :id"), {'id': property_id})
+
+
+@event.listens_for(Property, 'after_insert')
+def _property_inserted(mapper, connection, target):
+    if _uses_fts(connection):
+        _index_row(connection, target)
+
+
+@event.listens_for(Property, 'after_update')
+def _property_updated(mapper, connection, target):
+    if not _uses_fts(connection):
+        return
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SEARCH_COLUMNS):
+        _unindex_row(connection, target.id)
+        _index_row(connection, target)
+
+
+@event.listens_for(Property, 'after_delete')
+def _property_deleted(mapper, connection, target):
+    if _uses_fts(connection):
+        _unindex_row(connection, target.id)
+
+
+def index_properties(connection, rows):
+    """Index property rows that were inserted without going through the ORM."""
+    if _uses_fts(connection) and rows:
+        connection.execute(
+            text("INSERT INTO property_fts (rowid, title, description, location) "
+                 "VALUES (:id, :title, :description, :location)"),
+            [dict(row) for row in rows],
+        )
+
+
+def unindex_properties(connection, ids):
+    """Drop properties that are deleted without going through the ORM from the index."""
+    if _uses_fts(connection) and ids:
+        connection.execute(
+            property_fts.delete().where(property_fts.c.rowid.in_(ids))
+        )
+
+
+def search_terms(q):
+    return re.findall(r'\w+', q, flags=re.UNICODE)
+
+
+def _match_expression(terms):
+    # Quote every term so user input can never be parsed as FTS5 syntax; the
+    # last term is a prefix match so search-as-you-type works.
+    quoted = ['"%s"' % term for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_properties(q, offset, limit, columns):
+    """Return up to ``limit`` rows of ``columns`` for properties matching ``q``, best matches first."""
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    if _uses_fts(db.session.connection()):
+        query = (
+            Property.query
+            .join(property_fts, property_fts.c.rowid == Property.id)
+            .filter(literal_column('property_fts').op('MATCH')(_match_expression(terms)))
+            .order_by(func.bm25(literal_column('property_fts')), Property.id)
+        )
+    else:
+        # Other engines fall back to substring matching, served by the
+        # pg_trgm GIN indexes created in the search migration on PostgreSQL.
+        query = Property.query.filter(and_(*(
+            or_(*(getattr(Property, name).ilike(f'%{term}%') for name in SEARCH_COLUMNS))
+            for term in terms
+        ))).order_by(Property.id.desc())
+
+    return query.with_entities(*columns).offset(offset).limit(limit).all()
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the property full-text index from the property table."""
+    connection = db.session.connection()
+    if not _uses_fts(connection):
+        click.echo("Full-text index is only used on SQLite; nothing to rebuild.")
+        return
+
+    connection.execute(text(CREATE_FTS_TABLE))
+    connection.execute(text("DELETE FROM property_fts"))
+    connection.execute(text(
+        "INSERT INTO property_fts (rowid, title, description, location) "
+        "SELECT id, title, description, location FROM property"
+    ))
+    connection.execute(text("INSERT INTO property_fts (property_fts) VALUES ('optimize')"))
+    db.session.commit()
+
+    count = db.session.execute(text("SELECT count(*) FROM property_fts")).scalar()
+    click.echo(f"Indexed {count} properties.")
@@ -0,0 +1,151 @@
+# app/serializers.py
+
+import json
+from functools import lru_cache
+
+from flask import current_app
+from marshmallow import fields
+
+from app.pagination import PaginationError
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder gives identical bytes
+    orjson = None
+
+
+class SerializedRows(list):
+    """Dumped rows plus whether orjson can encode them byte-for-byte like jsonify."""
+
+    orjson_safe = False
+
+
+class RowSerializer:
+    """Row-to-dict function compiled once from a marshmallow schema.
+
+    ``columns`` are the SQL columns to select, in the order the compiled
+    function reads them from each row tuple, so list endpoints can use
+    ``with_entities(*serializer.columns)`` and skip ORM hydration entirely.
+    The output matches ``schema.dump(obj)`` for the field types the auto
+    schemas in app/schemas.py generate; anything else raises at compile time.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = []
+        self._lines = []
+        self._counter = 0
+        expression = self._compile_schema(schema, prefix='')
+        source = ['def dump(rows):', '    out = SerializedRows()', '    safe = True',
+                  '    for r in rows:'] + self._lines + [
+                  f'        out.append({expression})', '    out.orjson_safe = safe', '    return out']
+        namespace = {'SerializedRows': SerializedRows}
+        exec(compile('\n'.join(source), f'<serializer {type(schema).__name__}>', 'exec'), namespace)
+        self.dump = namespace['dump']
+
+    def _compile_schema(self, schema, prefix):
+        model = schema.opts.model
+        items = []
+        for name, field in schema.dump_fields.items():
+            key = field.data_key or name
+            attribute = field.attribute or name
+            if isinstance(field, fields.Nested):
+                nested = field.schema
+                items.append(f'{key!r}: {self._compile_schema(nested, prefix + attribute + "__")}')
+                continue
+            index = len(self.columns)
+            self.columns.append(getattr(model, attribute).label(prefix + attribute))
+            items.append(f'{key!r}: {self._convert(field, f"r[{index}]")}')
+        return '{' + ', '.join(items) + '}'
+
+    def _convert(self, field, value):
+        if isinstance(field, fields.Float):
+            # Python and orjson format floats identically only inside this
+            # range; outside it jsonify writes exponents orjson does not.
+            self._counter += 1
+            name = f'f{self._counter}'
+            self._lines += [
+                f'        {name} = {value}',
+                f'        if {name} is not None:',
+                f'            {name} = float({name})',
+                f'            if {name} and not 1e-4 <= abs({name}) < 1e16:',
+                '                safe = False',
+            ]
+            return name
+        if isinstance(field, fields.Boolean):
+            return f'(None if {value} is None else bool({value}))'
+        if isinstance(field, fields.Integer):
+            return f'(None if {value} is None else int({value}))'
+        if isinstance(field, fields.DateTime) and field.format in (None, 'iso'):
+            return f'(None if {value} is None else {value}.isoformat())'
+        if isinstance(field, fields.String):
+            return f'(None if {value} is None else str({value}))'
+        if type(field) is fields.Field:
+            return value
+        raise TypeError(f"No compiled serializer for {type(field).__name__}")
+
+    def with_columns(self, *extra):
+        """Return the projection plus any ``extra`` columns (e.g. sort keys) it lacks.
+
+        The compiled function only reads its own positions, so the extra
+        columns are selected but never serialized.
+        """
+        names = {column.name for column in self.columns}
+        return self.columns + [column.label(column.key) for column in extra if column.key not in names]
+
+
+@lru_cache(maxsize=128)
+def _compiled(schema_cls, only):
+    return RowSerializer(schema_cls(only=only) if only else schema_cls())
+
+
+def serializer_for(schema_cls, fields_param=None):
+    """Return the compiled serializer for the sparse fieldset in a ``fields=`` parameter.
+
+    Names are validated against the schema (``property.title`` selects a
+    nested field); serializers are compiled once per distinct fieldset.
+    """
+    only = None
+    if fields_param:
+        only = frozenset(name.strip() for name in fields_param.split(',') if name.strip())
+        invalid = sorted(name for name in only if not _is_field(_compiled(schema_cls, None).schema, name))
+        if invalid:
+            raise PaginationError(f"Unknown fields: {', '.join(invalid)}")
+    return _compiled(schema_cls, only or None)
+
+
+def _is_field(schema, name):
+    head, _, rest = name.partition('.')
+    field = schema.dump_fields.get(head)
+    if field is None or not rest:
+        return field is not None
+    return isinstance(field, fields.Nested) and _is_field(field.schema, rest)
+
+
+def dumps(payload):
+    """Encode ``payload`` as compact, key-sorted JSON bytes, like jsonify does."""
+    if orjson is not None and getattr(payload, 'orjson_safe', False):
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        # jsonify escapes non-ASCII text; only fall back when there is any
+        if body.isascii():
+            return body
+    return json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode()
+
+
+def dumps_lines(rows):
+    """Encode dumped rows as NDJSON bytes, one compact object per line."""
+    if orjson is not None and getattr(rows, 'orjson_safe', False):
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+        body = b''.join(orjson.dumps(row, option=option) for row in rows)
+        if body.isascii():
+            return body
+    return ''.join(
+        json.dumps(row, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n' for row in rows
+    ).encode()
+
+
+def json_response(payload):
+    """Drop-in for ``jsonify(payload)`` that uses the fast encoder when it is safe."""
+    if current_app.debug:
+        return current_app.json.response(payload)
+    return current_app.response_class(dumps(payload) + b'\n', mimetype='application/json')
@@ -0,0 +1,241 @@
+# app/similar.py
+
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from app.database import RoutingSession
+from app.models import Property, User, Wishlist
+
+# Per-slot feature columns and their numpy dtypes
+COLUMNS = {'ids': 'q', 'log_price': 'd', 'types': 'i', 'locations': 'i', 'live': 'b'}
+
+# Distance weights: a different type or location costs as much as a price
+# e-fold apart; sharing the most wishlisters with the listing earns back one
+TYPE_WEIGHT = 1.0
+LOCATION_WEIGHT = 1.0
+CO_WISHLIST_WEIGHT = 1.0
+
+
+def _log_price(price):
+    return math.log1p(max(price or 0.0, 0.0))
+
+
+class SimilarityIndex:
+    """In-process index of listing features for nearest-neighbour lookups.
+
+    Each listing occupies a slot in contiguous feature columns: log price and
+    integer codes for property type and location, plus a live flag. Wishlist
+    co-occurrence is kept as sparse sets of slots per user. ``similar`` scores
+    every slot in one vectorized pass and picks the top ``k`` with
+    ``argpartition``.
+
+    The index is built from the database on first use and then kept current
+    by ``apply``, fed with the changes of each committed session. Like
+    ``response_cache`` it lives in process memory, so writes made by other
+    workers only show up when the index is rebuilt after ``max_age`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.max_age = 0
+        self.built_at = None
+        self._reset()
+
+    def init_app(self, app):
+        self.max_age = app.config['SIMILAR_INDEX_MAX_AGE']
+        app.extensions['similar_index'] = self
+
+    def _reset(self):
+        self._size = 0
+        self._slots = {}
+        self._free = []
+        self._codes = {'types': {}, 'locations': {}}
+        self._wishers = defaultdict(set)  # slot -> user ids
+        self._wished = defaultdict(set)  # user id -> slots
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, np.zeros(0, dtype=typecode))
+
+    def _grow(self):
+        capacity = max(1024, 2 * self._size)
+        for name, typecode in COLUMNS.items():
+            grown = np.zeros(capacity, dtype=typecode)
+            grown[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, grown)
+
+    def _code(self, kind, value):
+        codes = self._codes[kind]
+        return codes.setdefault(value, len(codes))
+
+    def _upsert(self, property_id, price, property_type, location):
+        slot = self._slots.get(property_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._size == len(self.ids):
+                    self._grow()
+                slot = self._size
+                self._size += 1
+            self._slots[property_id] = slot
+        self.ids[slot] = property_id
+        self.log_price[slot] = _log_price(price)
+        self.types[slot] = self._code('types', property_type)
+        self.locations[slot] = self._code('locations', location)
+        self.live[slot] = 1
+
+    def _remove(self, property_id):
+        slot = self._slots.pop(property_id, None)
+        if slot is None:
+            return
+        self.live[slot] = 0
+        for user_id in self._wishers.pop(slot, ()):
+            self._wished[user_id].discard(slot)
+        self._free.append(slot)
+
+    def _wish(self, user_id, property_id):
+        slot = self._slots.get(property_id)
+        if slot is not None:
+            self._wishers[slot].add(user_id)
+            self._wished[user_id].add(slot)
+
+    def _unwish(self, user_id, property_id):
+        slot = self._slots.get(property_id)
+        if slot is not None:
+            self._wishers[slot].discard(user_id)
+            self._wished[user_id].discard(slot)
+
+    def _forget_user(self, user_id):
+        for slot in self._wished.pop(user_id, ()):
+            self._wishers[slot].discard(user_id)
+
+    def build(self, session):
+        """Load every listing and wishlist entry; two queries, no ORM objects."""
+        with self._lock:
+            self._reset()
+            for row in session.execute(
+                select(Property.id, Property.price, Property.property_type, Property.location)
+            ):
+                self._upsert(*row)
+            for user_id, property_id in session.execute(select(Wishlist.user_id, Wishlist.property_id)):
+                self._wish(user_id, property_id)
+            self.built_at = time.monotonic()
+
+    def ensure(self, session):
+        built_at = self.built_at
+        if built_at is None or (self.max_age and time.monotonic() - built_at > self.max_age):
+            self.build(session)
+
+    def apply(self, changes):
+        """Replay committed ``(operation, *args)`` changes; every operation is idempotent."""
+        with self._lock:
+            if self.built_at is None:
+                return  # the first build reads them from the database
+            for operation, *args in changes:
+                getattr(self, '_' + operation)(*args)
+
+    def __contains__(self, property_id):
+        return property_id in self._slots
+
+    def similar(self, property_id, k):
+        """Ids and distances of the ``k`` listings closest to ``property_id``, closest first."""
+        with self._lock:
+            slot = self._slots.get(property_id)
+            if slot is None:
+                return []
+            co_wished = [other for user_id in self._wishers.get(slot, ()) for other in self._wished[user_id]]
+            return self._similar(slot, k, co_wished)
+
+    def _similar(self, slot, k, co_wished):
+        n = self._size
+        distance = np.abs(self.log_price[:n] - self.log_price[slot])
+        distance += TYPE_WEIGHT * (self.types[:n] != self.types[slot])
+        distance += LOCATION_WEIGHT * (self.locations[:n] != self.locations[slot])
+        if co_wished:
+            shared = np.bincount(np.asarray(co_wished), minlength=n)[:n]
+            shared[slot] = 0
+            if shared.any():
+                distance -= CO_WISHLIST_WEIGHT * shared / shared.max()
+        distance[self.live[:n] == 0] = np.inf
+        distance[slot] = np.inf
+
+        k = min(k, len(self._slots) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(distance, k - 1)[:k] if k < n else np.arange(n)
+        # Closest first, ties broken by id so pages are stable
+        top = top[np.lexsort((self.ids[top], distance[top]))]
+        return [(int(self.ids[i]), float(distance[i])) for i in top if np.isfinite(distance[i])]
+
+
+similar_index = SimilarityIndex()
+
+
+def _pending(session):
+    return session.info.setdefault('similar_index_changes', [])
+
+
+def remember_properties(session, rows):
+    """Queue properties written without going through the ORM for the index."""
+    _pending(session).extend(
+        ('upsert', row['id'], row['price'], row['property_type'], row['location']) for row in rows
+    )
+
+
+def forget_properties(session, ids):
+    """Queue properties deleted without going through the ORM for removal from the index."""
+    _pending(session).extend(('remove', property_id) for property_id in ids)
+
+
+def remember_wish(session, user_id, property_id):
+    """Queue a wishlist entry inserted without going through the ORM for the index."""
+    _pending(session).append(('wish', user_id, property_id))
+
+
+# Changes are queued during the flush and reach the index only once the
+# transaction commits, so a rollback never leaves phantom listings behind
+
+@event.listens_for(Property, 'after_insert')
+@event.listens_for(Property, 'after_update')
+def _property_written(mapper, connection, target):
+    _pending(object_session(target)).append(
+        ('upsert', target.id, target.price, target.property_type, target.location)
+    )
+
+
+@event.listens_for(Property, 'after_delete')
+def _property_deleted(mapper, connection, target):
+    _pending(object_session(target)).append(('remove', target.id))
+
+
+@event.listens_for(Wishlist, 'after_insert')
+def _wishlist_inserted(mapper, connection, target):
+    _pending(object_session(target)).append(('wish', target.user_id, target.property_id))
+
+
+@event.listens_for(Wishlist, 'after_delete')
+def _wishlist_deleted(mapper, connection, target):
+    _pending(object_session(target)).append(('unwish', target.user_id, target.property_id))
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    # Their wishlist rows go by ON DELETE CASCADE, unseen by the hooks above
+    _pending(object_session(target)).append(('forget_user', target.id))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    changes = session.info.pop('similar_index_changes', None)
+    if changes:
+        similar_index.apply(changes)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('similar_index_changes', None)
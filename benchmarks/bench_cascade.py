@@ -0,0 +1,86 @@
+"""Delete a listing with many applications and wishlist entries.
+
+Usage: python benchmarks/bench_cascade.py [applications]
+
+Times DELETE /properties/<id> with the database cascading to the child
+rows, the same delete with the ORM loading and deleting every child first
+(passive_deletes switched off, the previous behaviour), and
+DELETE /properties/batch. Each case gets a fresh listing on the same
+database and reports wall time and SQL statements.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func, insert, select
+
+from app import create_app, db
+from app.config import Config
+
+
+def main(count):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.DB_STARTUP = 'create'
+    app = create_app()
+
+    from app.models import Application, Property, User, Wishlist
+
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+             'role': 'agent' if i == 0 else 'buyer'}
+            for i in range(count + 1)
+        ])
+        db.session.commit()
+        agent = {'id': 1, 'username': 'user0', 'email': 'user0@example.com', 'role': 'agent'}
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity=agent)}
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+    client = app.test_client()
+
+    def listing():
+        response = client.post('/properties', headers=headers, json={
+            'title': 'Busy listing', 'description': 'Everyone applies', 'price': 1500,
+            'location': 'Springfield', 'property_type': 'House'})
+        property_id = response.get_json()['id']
+        with app.app_context():
+            buyers = range(2, count + 2)
+            db.session.execute(insert(Application), [
+                {'user_id': user_id, 'property_id': property_id, 'buyer_name': f'user{user_id - 1}'}
+                for user_id in buyers
+            ])
+            db.session.execute(insert(Wishlist), [{'user_id': user_id, 'property_id': property_id} for user_id in buyers])
+            db.session.commit()
+        return property_id
+
+    def timed(name, method, url, **kwargs):
+        statements.clear()
+        start = time.perf_counter()
+        response = client.open(url, method=method, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.get_json()
+        with app.app_context():
+            left = db.session.scalar(select(func.count()).select_from(Application))
+        print(f"{name:<34} {elapsed * 1000:>10.1f} {len(statements):>10} {left:>12}")
+
+    print(f"{count} applications and {count} wishlist entries per listing")
+    print(f"{'case':<34} {'ms':>10} {'statements':>10} {'apps left':>12}")
+    timed('DELETE /properties/<id>', 'DELETE', f'/properties/{listing()}')
+
+    relationships = (Property.applications.property, Property.favorites.property)
+    for relationship in relationships:
+        relationship.passive_deletes = False
+    timed('  ORM cascade (previous)', 'DELETE', f'/properties/{listing()}')
+    for relationship in relationships:
+        relationship.passive_deletes = True
+
+    timed('DELETE /properties/batch', 'DELETE', '/properties/batch', json={'ids': [listing()]})
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
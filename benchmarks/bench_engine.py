@@ -0,0 +1,102 @@
+"""Concurrent read/write throughput under each database engine profile.
+
+Usage: python benchmarks/bench_engine.py [--seconds N] [--readers N] [--writers N] [--url URL]
+
+Without --url the SQLite profile is compared against SQLite with default
+pragmas on fresh database files. With --url (e.g. a PostgreSQL DSN) the
+server profile is measured against that database; its tables must exist.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app import config, create_app, db
+from app.config import Config
+
+READ = text("SELECT id, title, price, location FROM property ORDER BY id DESC LIMIT 50")
+WRITE = text(
+    "INSERT INTO property (title, description, price, location, listed_by, is_approved, "
+    "property_type, agent_name, agent_email) "
+    "VALUES ('Listing', 'Description', 1000, 'Town', 1, 0, 'House', 'agent', 'agent@example.com')"
+)
+
+
+def run(name, url, profile, pragmas, args):
+    Config.SQLALCHEMY_DATABASE_URI = url
+    Config.DB_STARTUP = 'none'  # SQLite tables are created below; server ones must exist
+    Config.SQLALCHEMY_ENGINE_OPTIONS = config.ENGINE_PROFILES[profile]
+    Config.SQLITE_PRAGMAS = pragmas
+    app = create_app()
+
+    with app.app_context():
+        if url.startswith('sqlite'):
+            db.create_all()
+            db.session.execute(text(
+                "INSERT INTO user (id, username, email, password, role) "
+                "VALUES (1, 'agent', 'agent@example.com', 'x', 'agent')"
+            ))
+            db.session.commit()
+        engine = db.engine
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def worker(statement, key, commit):
+        done = errors = 0
+        with engine.connect() as connection:
+            while time.monotonic() < deadline:
+                try:
+                    result = connection.execute(statement)
+                    if commit:
+                        connection.commit()
+                    else:
+                        result.fetchall()
+                        connection.rollback()
+                    done += 1
+                except Exception:
+                    connection.rollback()
+                    errors += 1
+        with lock:
+            counts[key] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=(READ, 'reads', False)) for _ in range(args.readers)]
+    threads += [threading.Thread(target=worker, args=(WRITE, 'writes', True)) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(f"{name:<16} {counts['reads'] / args.seconds:>10.0f} {counts['writes'] / args.seconds:>10.0f} "
+          f"{counts['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--url')
+    args = parser.parse_args()
+
+    print(f"{'profile':<16} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    if args.url:
+        run('server', args.url, 'server', {}, args)
+        return
+    tuned = dict(Config.SQLITE_PRAGMAS)
+    directory = tempfile.mkdtemp()
+    run('sqlite-default', 'sqlite:///' + os.path.join(directory, 'default.db'), 'sqlite', {}, args)
+    run('sqlite-tuned', 'sqlite:///' + os.path.join(directory, 'tuned.db'), 'sqlite', tuned, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Hold thousands of idle /events subscribers and fan events out to them.
+
+Usage: python benchmarks/bench_events.py [subscribers] [events]
+
+Opens the given number of GET /events streams through the test client,
+each read by its own thread as a threaded WSGI server would, and reports
+the memory they hold, the CPU the process burns while they sit idle, and
+how long each published event takes to reach every subscriber.
+"""
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import Config
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(count, events):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.DB_STARTUP = 'create'
+    Config.SQL_INSTRUMENTATION = False
+    Config.EVENTS_HEARTBEAT_SECONDS = 30
+    app = create_app()
+
+    from app.events import event_broker
+
+    # Threaded servers usually run request threads on small stacks
+    threading.stack_size(256 * 1024)
+    client = app.test_client()
+    with app.app_context():
+        headers = [
+            {'Authorization': 'Bearer ' + create_access_token(
+                identity={'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'role': 'buyer'})}
+            for i in range(count)
+        ]
+
+    lock = threading.Lock()
+    pending = [0]
+    delivered = threading.Event()
+
+    def read(response):
+        for chunk in response.response:
+            if chunk.startswith(b'id:'):
+                with lock:
+                    pending[0] -= chunk.count(b'\nevent:')
+                    if pending[0] == 0:
+                        delivered.set()
+
+    before = rss_mb()
+    start = time.perf_counter()
+    for index in range(count):
+        response = client.get('/events', headers=headers[index])
+        threading.Thread(target=read, args=(response,), daemon=True).start()
+    opened = time.perf_counter() - start
+    time.sleep(1)
+    held = rss_mb() - before
+
+    cpu = time.process_time()
+    time.sleep(3)
+    idle_cpu = (time.process_time() - cpu) / 3 * 100
+
+    latencies = []
+    for sequence in range(1, events + 1):
+        pending[0] = count
+        delivered.clear()
+        start = time.perf_counter()
+        event_broker.publish('property.updated', {'ids': [sequence]})
+        delivered.wait(timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"{count} subscribers opened in {opened:.2f} s ({opened / count * 1000:.2f} ms each)")
+    print(f"memory held: {held:.1f} MiB ({held * 1024 / count:.1f} KiB per subscriber)")
+    print(f"CPU while idle: {idle_cpu:.1f}% of one core")
+    print(f"publish to all delivered: p50 {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+    print(f"broker: {event_broker.stats()}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
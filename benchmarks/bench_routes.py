@@ -0,0 +1,417 @@
+"""Load test every API route with concurrent buyers, agents and sign-ins.
+
+Usage: python benchmarks/bench_routes.py [--seconds N] [--buyers N] [--agents N] [--auth N]
+                                         [--properties N] [--seed N] [--output FILE]
+                                         [--baseline FILE] [--threshold PCT]
+
+A throwaway SQLite database is seeded with agents, buyers, properties,
+applications and wishlist entries, then virtual users drive create_app()
+through the test client from separate threads:
+
+- buyers browse heavily: listings with filters and sorts, search, facets,
+  map lookups, similar listings, and now and then wishlist changes and applications;
+- agents triage: their applications and dashboard, accept/reject/batch,
+  listing edits, bulk imports and exports;
+- auth users register and log in, which exercises the password pool.
+
+For each route (rule and method) the run reports request count,
+throughput, p50/p95/p99 latency, SQL statements per request and 5xx
+errors. --output saves the results as JSON; --baseline compares against
+an earlier file and exits with status 1 when a route's p95 grew by more
+than --threshold percent or it issues more SQL statements per request.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import request
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert, select
+
+from app import create_app, db
+from app.config import Config
+
+LOCATIONS = ['Springfield', 'Riverside', 'Fairview', 'Greenville', 'Madison', 'Georgetown', 'Salem', 'Clinton']
+WORDS = ['sunny', 'quiet', 'garden', 'renovated', 'spacious', 'cozy', 'modern', 'balcony', 'parking', 'view']
+TYPES = ['Apartment', 'House', 'Room']
+# Map lookups centre on this point, with listings spread over about 100 km
+CENTRE = (40.0, -74.0)
+
+# Minimum samples per route before it is compared against a baseline
+MIN_SAMPLES = 20
+
+
+class Recorder:
+    """Collects latency and SQL statement counts per route across threads."""
+
+    def __init__(self):
+        self.enabled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.statuses = defaultdict(Counter)
+
+    def count_query(self, *args):
+        self._local.queries = getattr(self._local, 'queries', 0) + 1
+
+    def note_route(self, response):
+        self._local.route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        return response
+
+    def call(self, client, method, url, **kwargs):
+        self._local.queries = 0
+        self._local.route = None
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()  # drain streamed exports inside the timing
+        elapsed = time.perf_counter() - start
+        if self.enabled and self._local.route:
+            with self._lock:
+                self.latencies[self._local.route].append(elapsed)
+                self.queries[self._local.route] += self._local.queries
+                self.statuses[self._local.route][response.status_code] += 1
+        return response
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def seed(app, agent_count, buyer_count, property_count, rng):
+    from app.bulk import import_properties
+    from app.models import Application, Property, User, Wishlist
+    from app.passwords import password_hasher
+    from app.popularity import recount_popularity
+
+    with app.app_context():
+        db.create_all()
+        password = password_hasher.hash('password')
+        users = [
+            {'username': f'agent{i}', 'email': f'agent{i}@example.com', 'password': password, 'role': 'agent'}
+            for i in range(agent_count)
+        ] + [
+            {'username': f'buyer{i}', 'email': f'buyer{i}@example.com', 'password': password, 'role': 'buyer'}
+            for i in range(buyer_count)
+        ]
+        db.session.execute(insert(User), users)
+        db.session.commit()
+        profiles = [dict(row._mapping) for row in
+                    db.session.execute(select(User.id, User.username, User.email, User.role).order_by(User.id))]
+        agents = [profile for profile in profiles if profile['role'] == 'agent']
+        buyers = [profile for profile in profiles if profile['role'] == 'buyer']
+
+        per_agent = property_count // len(agents)
+        for agent in agents:
+            rows = [{
+                'title': f"{rng.choice(WORDS).title()} {rng.choice(TYPES).lower()} in {rng.choice(LOCATIONS)}",
+                'description': ' '.join(rng.choices(WORDS, k=12)),
+                'price': round(rng.uniform(200, 5000), 2),
+                'location': rng.choice(LOCATIONS),
+                'property_type': rng.choice(TYPES),
+                'latitude': CENTRE[0] + rng.uniform(-0.5, 0.5),
+                'longitude': CENTRE[1] + rng.uniform(-0.5, 0.5),
+            } for _ in range(per_agent)]
+            import_properties(rows, agent)
+        db.session.execute(Property.__table__.update().values(is_approved=True))
+
+        property_ids = db.session.scalars(select(Property.id)).all()
+        applications, wishlist = [], []
+        for buyer in buyers:
+            for property_id in rng.sample(property_ids, min(20, len(property_ids))):
+                applications.append({'user_id': buyer['id'], 'property_id': property_id,
+                                     'buyer_name': buyer['username'], 'buyer_email': buyer['email']})
+            for property_id in rng.sample(property_ids, min(20, len(property_ids))):
+                wishlist.append({'user_id': buyer['id'], 'property_id': property_id})
+        db.session.execute(insert(Application), applications)
+        db.session.execute(insert(Wishlist), wishlist)
+        # Core inserts skip the counter hooks
+        recount_popularity(db.session.connection())
+        db.session.commit()
+
+        owned = defaultdict(list)
+        for application_id, listed_by in db.session.execute(
+            select(Application.id, Property.listed_by).join(Property, Property.id == Application.property_id)
+        ):
+            owned[listed_by].append(application_id)
+        for profile in profiles:
+            profile['token'] = create_access_token(identity=dict(profile))
+            profile['applications'] = owned.get(profile['id'], [])
+            profile['properties'] = []
+        return agents, buyers, property_ids
+
+
+def auth_header(user):
+    return {'Authorization': f"Bearer {user['token']}"}
+
+
+def browse_query(rng):
+    params = [f"limit={rng.choice([20, 50])}"]
+    if rng.random() < 0.5:
+        params.append(f"location={rng.choice(LOCATIONS)}")
+    if rng.random() < 0.4:
+        params.append(f"property_type={rng.choice(TYPES)}")
+    if rng.random() < 0.4:
+        low = rng.randrange(200, 3000, 100)
+        params.append(f"min_price={low}&max_price={low + rng.randrange(500, 2000, 100)}")
+    if rng.random() < 0.5:
+        params.append(f"sort={rng.choice(['newest', 'oldest', 'price_asc', 'price_desc', 'popular'])}")
+    if rng.random() < 0.2:
+        params.append('fields=id,title,price,location')
+    if rng.random() < 0.3:
+        params.append('include=is_wishlisted')
+    return '&'.join(params)
+
+
+def buyer_actions(recorder, client, user, property_ids, rng):
+    headers = auth_header(user)
+    lat, lon = CENTRE[0] + rng.uniform(-0.4, 0.4), CENTRE[1] + rng.uniform(-0.4, 0.4)
+
+    def browse():
+        response = recorder.call(client, 'GET', f'/properties?{browse_query(rng)}', headers=headers)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor and rng.random() < 0.3:
+            recorder.call(client, 'GET', f'/properties?limit=50&cursor={cursor}', headers=headers)
+
+    def apply():
+        response = recorder.call(client, 'POST', '/applications', headers=headers,
+                                 json={'property_id': rng.choice(property_ids)})
+        if response.status_code == 201 and rng.random() < 0.2:
+            recorder.call(client, 'DELETE', f"/applications/{response.get_json()['id']}", headers=headers)
+
+    return [
+        (30, browse),
+        (10, lambda: recorder.call(client, 'GET', f'/properties/search?q={rng.choice(WORDS)}', headers=headers)),
+        (8, lambda: recorder.call(client, 'GET', '/properties/facets', headers=headers)),
+        (6, lambda: recorder.call(client, 'GET', f'/properties/nearby?lat={lat}&lon={lon}&radius=5', headers=headers)),
+        (4, lambda: recorder.call(
+            client, 'GET', f'/properties/within?min_lat={lat - 0.05}&min_lon={lon - 0.05}'
+                           f'&max_lat={lat + 0.05}&max_lon={lon + 0.05}', headers=headers)),
+        (4, lambda: recorder.call(client, 'GET', f'/properties/{rng.choice(property_ids)}/similar?k=10',
+                                  headers=headers)),
+        (6, lambda: recorder.call(client, 'GET', '/wishlist', headers=headers)),
+        (4, lambda: recorder.call(client, 'POST', '/wishlist', headers=headers,
+                                  json={'property_id': rng.choice(property_ids)})),
+        (3, lambda: recorder.call(client, 'DELETE', '/wishlist', headers=headers,
+                                  json={'property_id': rng.choice(property_ids)})),
+        (4, apply),
+        (6, lambda: recorder.call(client, 'GET', '/applications', headers=headers)),
+        (1, lambda: recorder.call(client, 'GET', '/metrics')),
+    ]
+
+
+def agent_actions(recorder, client, user, rng):
+    headers = auth_header(user)
+
+    def listing():
+        return {'title': f"{rng.choice(WORDS).title()} listing", 'description': ' '.join(rng.choices(WORDS, k=12)),
+                'price': round(rng.uniform(200, 5000), 2), 'location': rng.choice(LOCATIONS),
+                'property_type': rng.choice(TYPES)}
+
+    def decide(action):
+        if user['applications']:
+            recorder.call(client, 'PUT', f"/applications/{rng.choice(user['applications'])}/{action}",
+                          headers=headers)
+
+    def batch():
+        if user['applications']:
+            ids = rng.sample(user['applications'], min(5, len(user['applications'])))
+            recorder.call(client, 'PUT', '/applications/batch', headers=headers,
+                          json={'ids': ids, 'status': rng.choice(['approved', 'rejected'])})
+
+    def create():
+        response = recorder.call(client, 'POST', '/properties', headers=headers, json=listing())
+        if response.status_code == 201:
+            user['properties'].append(response.get_json()['id'])
+
+    def edit():
+        if user['properties']:
+            recorder.call(client, 'PUT', f"/properties/{rng.choice(user['properties'])}", headers=headers,
+                          json={'price': round(rng.uniform(200, 5000), 2)})
+
+    def delete():
+        if user['properties']:
+            property_id = user['properties'].pop(rng.randrange(len(user['properties'])))
+            recorder.call(client, 'DELETE', f'/properties/{property_id}', headers=headers)
+
+    def batch_delete():
+        if len(user['properties']) > 1:
+            ids = [user['properties'].pop(rng.randrange(len(user['properties'])))
+                   for _ in range(min(3, len(user['properties']) - 1))]
+            recorder.call(client, 'DELETE', '/properties/batch', headers=headers, json={'ids': ids})
+
+    return [
+        (20, lambda: recorder.call(client, 'GET', '/agent/applications?limit=50', headers=headers)),
+        (10, lambda: recorder.call(client, 'GET', '/agent/dashboard', headers=headers)),
+        (8, lambda: decide('accept')),
+        (8, lambda: decide('reject')),
+        (4, batch),
+        (6, create),
+        (6, edit),
+        (1, delete),
+        (1, batch_delete),
+        (1, lambda: recorder.call(client, 'POST', '/properties/bulk', headers=headers,
+                                  json=[listing() for _ in range(50)])),
+        (1, lambda: recorder.call(client, 'GET', '/export/properties?format=ndjson', headers=headers)),
+        (1, lambda: recorder.call(client, 'GET', '/export/agent/applications?format=csv', headers=headers)),
+        (10, lambda: recorder.call(client, 'GET', f'/properties?{browse_query(rng)}', headers=headers)),
+    ]
+
+
+def auth_actions(recorder, client, rng, counter):
+    def register():
+        number = next(counter)
+        recorder.call(client, 'POST', '/register', json={
+            'username': f'visitor{number}', 'email': f'visitor{number}@example.com',
+            'password': 'password', 'role': 'buyer'})
+
+    return [
+        (1, register),
+        (3, lambda: recorder.call(client, 'POST', '/login', json={
+            'email': f'buyer{rng.randrange(10)}@example.com', 'password': 'password'})),
+    ]
+
+
+def drive(actions, deadline):
+    weights = [weight for weight, _ in actions]
+    functions = [function for _, function in actions]
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        rng.choices(functions, weights)[0]()
+
+
+def summarize(recorder, seconds):
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        statuses = recorder.statuses[route]
+        routes[route] = {
+            'requests': len(latencies),
+            'throughput': round(len(latencies) / seconds, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'queries_per_request': round(recorder.queries[route] / len(latencies), 2),
+            'errors': sum(count for status, count in statuses.items() if status >= 500),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+    return routes
+
+
+def compare(routes, baseline, threshold):
+    """Return a description of every route that regressed against ``baseline``."""
+    regressions = []
+    for route, before in baseline['routes'].items():
+        after = routes.get(route)
+        if after is None or min(after['requests'], before['requests']) < MIN_SAMPLES:
+            continue
+        if after['p95_ms'] > before['p95_ms'] * (1 + threshold / 100):
+            regressions.append(f"{route}: p95 {before['p95_ms']:.1f} ms -> {after['p95_ms']:.1f} ms")
+        # Allow for routes whose statement count depends on the data they hit
+        if after['queries_per_request'] > before['queries_per_request'] + 0.5:
+            regressions.append(f"{route}: {before['queries_per_request']} -> "
+                               f"{after['queries_per_request']} queries per request")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=1)
+    parser.add_argument('--buyers', type=int, default=8)
+    parser.add_argument('--agents', type=int, default=2)
+    parser.add_argument('--auth', type=int, default=1)
+    parser.add_argument('--properties', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=20, help="allowed p95 growth in percent")
+    args = parser.parse_args()
+
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.DB_STARTUP = 'none'  # tables are created below
+    app = create_app()
+    rng = random.Random(args.seed)
+    # Logins pick from the first ten buyers, so always seed at least those
+    agents, buyers, property_ids = seed(app, max(args.agents, 1), max(args.buyers, 10), args.properties, rng)
+
+    recorder = Recorder()
+    app.after_request(recorder.note_route)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', recorder.count_query)
+
+    counter = iter(range(10 ** 9))
+    start = time.monotonic()
+    deadline = start + args.warmup + args.seconds
+    workers = [buyer_actions(recorder, app.test_client(), buyer, property_ids, random.Random(rng.random()))
+               for buyer in buyers[:args.buyers]]
+    workers += [agent_actions(recorder, app.test_client(), agent, random.Random(rng.random()))
+                for agent in agents[:args.agents]]
+    workers += [auth_actions(recorder, app.test_client(), random.Random(rng.random()), counter)
+                for _ in range(args.auth)]
+    threads = [threading.Thread(target=drive, args=(actions, deadline)) for actions in workers]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.enabled = True
+    for thread in threads:
+        thread.join()
+
+    routes = summarize(recorder, args.seconds)
+    print(f"{'route':<44} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql':>6} {'5xx':>5}")
+    for route, stats in routes.items():
+        print(f"{route:<44} {stats['requests']:>6} {stats['throughput']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['queries_per_request']:>6.1f} "
+              f"{stats['errors']:>5}")
+
+    exercised = {route.split(' ', 1)[1] for route in routes}
+    missed = sorted(rule.rule for rule in app.url_map.iter_rules()
+                    if rule.endpoint != 'static' and rule.rule not in exercised)
+    if missed:
+        print(f"Not exercised: {', '.join(missed)}")
+
+    if args.output:
+        result = {
+            'meta': {
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'seconds': args.seconds,
+                'buyers': args.buyers,
+                'agents': args.agents,
+                'auth': args.auth,
+                'properties': len(property_ids),
+            },
+            'routes': routes,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(routes, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
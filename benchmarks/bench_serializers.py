@@ -0,0 +1,73 @@
+"""Compare marshmallow + jsonify against the compiled row serializer for GET /properties.
+
+Usage: python benchmarks/bench_serializers.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+
+from app import create_app, db
+from app.config import Config
+
+
+def best_of(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.DB_STARTUP = 'none'  # tables are created below
+    app = create_app()
+
+    from app.models import Property, User
+    from app import schemas
+    from app.serializers import json_response, serializer_for
+
+    property_schema = schemas.shared('PropertySchema')
+    property_rows = serializer_for(schemas.PropertySchema)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='agent', email='agent@example.com', password='x', role='agent'))
+        db.session.commit()
+
+        print(f"{'rows':>8} {'marshmallow':>12} {'compiled':>12} {'speedup':>8}")
+        loaded = 0
+        for size in sorted(sizes):
+            db.session.execute(Property.__table__.insert(), [
+                {'title': f'Listing {i}', 'description': 'A bright two bedroom apartment ' * 4,
+                 'price': 1000.0 + i, 'location': f'District {i % 50}', 'listed_by': 1,
+                 'property_type': ('Apartment', 'House', 'Room')[i % 3], 'is_approved': i % 2 == 0,
+                 'agent_name': 'agent', 'agent_email': 'agent@example.com'}
+                for i in range(loaded, size)
+            ])
+            db.session.commit()
+            loaded = size
+
+            def marshmallow():
+                db.session.expunge_all()
+                with app.test_request_context():
+                    return jsonify(property_schema.dump(Property.query.all(), many=True)).data
+
+            def compiled():
+                with app.test_request_context():
+                    rows = Property.query.with_entities(*property_rows.columns).all()
+                    return json_response(property_rows.dump(rows)).data
+
+            assert marshmallow() == compiled()
+            slow, fast = best_of(marshmallow), best_of(compiled)
+            print(f"{size:>8} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
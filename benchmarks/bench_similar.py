@@ -0,0 +1,91 @@
+"""Similar-listings lookups against a large catalogue.
+
+Usage: python benchmarks/bench_similar.py [listings] [queries]
+
+Seeds a throwaway SQLite database with listings spread over a few types and
+locations plus wishlists, builds the index in app/similar.py and reports the
+build time, the time of SimilarityIndex.similar() alone and of the full
+GET /properties/<id>/similar request.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.cache import response_cache
+from app.config import Config
+
+TYPES = ['Apartment', 'House', 'Room']
+LOCATIONS = [f'District {i}' for i in range(40)]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95)]
+
+
+def main(count, queries):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    Config.DB_STARTUP = 'create'
+    Config.SQL_INSTRUMENTATION = False
+    app = create_app()
+
+    from app import similar
+    from app.models import Property, User, Wishlist
+
+    rng = random.Random(1)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x', 'role': 'buyer'}
+            for i in range(1000)
+        ])
+        db.session.execute(insert(Property), [
+            {'title': 'Listing', 'description': 'Benchmark listing', 'price': round(rng.lognormvariate(7.5, 0.6), 2),
+             'location': rng.choice(LOCATIONS), 'property_type': rng.choice(TYPES), 'listed_by': 1,
+             'agent_name': 'user0', 'agent_email': 'user0@example.com'}
+            for _ in range(count)
+        ])
+        db.session.execute(insert(Wishlist), [
+            {'user_id': user_id, 'property_id': property_id}
+            for user_id in range(1, 1001) for property_id in rng.sample(range(1, count + 1), 20)
+        ])
+        db.session.commit()
+        token = create_access_token(identity={'id': 1, 'username': 'user0', 'email': 'user0@example.com', 'role': 'buyer'})
+
+        start = time.perf_counter()
+        similar.similar_index.build(db.session)
+        build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{count} listings")
+    print(f"index build: {build_ms:.1f} ms")
+
+    ids = [rng.randint(1, count) for _ in range(queries)]
+    timings = []
+    for property_id in ids:
+        start = time.perf_counter()
+        similar.similar_index.similar(property_id, 10)
+        timings.append((time.perf_counter() - start) * 1000)
+    print("similar(k=10):         p50 %.3f ms  p95 %.3f ms" % percentiles(timings))
+
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + token}
+    timings = []
+    for property_id in ids:
+        response_cache.clear()
+        start = time.perf_counter()
+        response = client.get(f'/properties/{property_id}/similar?k=10', headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_json()
+    print("GET .../similar?k=10:  p50 %.3f ms  p95 %.3f ms" % percentiles(timings))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,90 @@
+"""Worker startup cost: import time, create_app() and the first request.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--tree PATH ...]
+
+Every measurement runs in a fresh interpreter, as a newly forked or spawned
+worker would, against a copy of a database migrated to head. This tree is
+measured once per DB_STARTUP mode; each --tree (e.g. a `git worktree` of an
+older commit) is measured with its own defaults for comparison:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_startup.py --tree /tmp/before
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+booted = time.perf_counter()
+from flask_jwt_extended import create_access_token
+with app.app_context():
+    token = create_access_token(identity={'id': 1, 'username': 'agent', 'email': 'agent@example.com', 'role': 'agent'})
+before_request = time.perf_counter()
+response = app.test_client().get('/properties', headers={'Authorization': 'Bearer ' + token})
+assert response.status_code == 200, response.get_data()
+done = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': booted - imported,
+                  'first_request': done - before_request}))
+"""
+
+
+def migrated_database(directory):
+    path = os.path.join(directory, 'migrated.db')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + path, DB_STARTUP='none')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'upgrade'],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+    return path
+
+
+def measure(tree, database, env_overrides, runs, directory):
+    timings = {'import': [], 'create_app': [], 'first_request': []}
+    # Deployed workers load cached bytecode, so allow writing it and
+    # discard the first run, which compiles it
+    env = {name: value for name, value in os.environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+    for run in range(runs + 1):
+        copy = os.path.join(directory, f'run{run}.db')
+        shutil.copyfile(database, copy)
+        output = subprocess.run([sys.executable, '-c', WORKER], cwd=tree, check=True, capture_output=True, text=True,
+                                env=dict(env, DATABASE_URL='sqlite:///' + copy, **env_overrides)).stdout
+        os.remove(copy)
+        if run == 0:
+            continue
+        for name, seconds in json.loads(output.splitlines()[-1]).items():
+            timings[name].append(seconds * 1000)
+    return {name: statistics.median(values) for name, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--tree', action='append', default=[], help="another checkout to compare")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = migrated_database(directory)
+
+    cases = [(f'DB_STARTUP={mode}', ROOT, {'DB_STARTUP': mode}) for mode in ('create', 'check', 'none')]
+    cases += [(tree, tree, {}) for tree in args.tree]
+
+    print(f"{'case':<32} {'import ms':>10} {'create_app ms':>14} {'1st request ms':>15} {'total ms':>9}")
+    for name, tree, env in cases:
+        result = measure(tree, database, env, args.runs, directory)
+        total = sum(result.values())
+        print(f"{name[-32:]:<32} {result['import']:>10.1f} {result['create_app']:>14.1f} "
+              f"{result['first_request']:>15.1f} {total:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""cascade deletes from user to its properties, applications and wishlist
+
+Revision ID: b4c5d6e7f8a9
+Revises: a2b3c4d5e6f7
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a2b3c4d5e6f7'
+branch_labels = None
+depends_on = None
+
+# The initial migration left these foreign keys unnamed; batch mode on
+# SQLite needs a name to drop one by
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+USER_FOREIGN_KEYS = (('property', 'listed_by'), ('application', 'user_id'), ('wishlist', 'user_id'))
+
+
+def _replace_user_foreign_key(table, column, ondelete):
+    existing = next(
+        fk['name'] for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if fk['constrained_columns'] == [column]
+    )
+    name = f'fk_{table}_{column}_user'
+    with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(existing or name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'user', [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    for table, column in USER_FOREIGN_KEYS:
+        _replace_user_foreign_key(table, column, 'CASCADE')
+
+
+def downgrade():
+    for table, column in USER_FOREIGN_KEYS:
+        _replace_user_foreign_key(table, column, None)
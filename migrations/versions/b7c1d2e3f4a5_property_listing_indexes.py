@@ -0,0 +1,38 @@
+"""property listing indexes
+
+Revision ID: b7c1d2e3f4a5
+Revises: a40ea92444e5
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c1d2e3f4a5'
+down_revision = 'a40ea92444e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.create_index('ix_property_price_id', ['price', 'id'], unique=False)
+        batch_op.create_index('ix_property_type_id', ['property_type', 'id'], unique=False)
+        batch_op.create_index('ix_property_type_price_id', ['property_type', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_property_location_id', ['location', 'id'], unique=False)
+        batch_op.create_index('ix_property_location_price_id', ['location', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_property_approved_id', ['is_approved', 'id'], unique=False)
+        batch_op.create_index('ix_property_approved_price_id', ['is_approved', 'price', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_approved_price_id')
+        batch_op.drop_index('ix_property_approved_id')
+        batch_op.drop_index('ix_property_location_price_id')
+        batch_op.drop_index('ix_property_location_id')
+        batch_op.drop_index('ix_property_type_price_id')
+        batch_op.drop_index('ix_property_type_id')
+        batch_op.drop_index('ix_property_price_id')
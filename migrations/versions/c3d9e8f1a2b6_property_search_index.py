@@ -0,0 +1,45 @@
+"""property search index
+
+Revision ID: c3d9e8f1a2b6
+Revises: b7c1d2e3f4a5
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d9e8f1a2b6'
+down_revision = 'b7c1d2e3f4a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS property_fts "
+            "USING fts5(title, description, location, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO property_fts (rowid, title, description, location) "
+            "SELECT id, title, description, location FROM property"
+        )
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ('title', 'description', 'location'):
+            op.execute(
+                f"CREATE INDEX ix_property_{column}_trgm ON property "
+                f"USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS property_fts")
+    elif dialect == 'postgresql':
+        for column in ('title', 'description', 'location'):
+            op.execute(f"DROP INDEX IF EXISTS ix_property_{column}_trgm")
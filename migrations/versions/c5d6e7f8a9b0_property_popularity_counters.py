@@ -0,0 +1,36 @@
+"""property application and wishlist counters
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d6e7f8a9b0'
+down_revision = 'b4c5d6e7f8a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('application_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('wishlist_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_property_popular', ['application_count', 'wishlist_count', 'id'], unique=False)
+
+    op.execute(
+        "UPDATE property SET "
+        "application_count = (SELECT count(*) FROM application WHERE application.property_id = property.id), "
+        "wishlist_count = (SELECT count(*) FROM wishlist WHERE wishlist.property_id = property.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_popular')
+        batch_op.drop_column('wishlist_count')
+        batch_op.drop_column('application_count')
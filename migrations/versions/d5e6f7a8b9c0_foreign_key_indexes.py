@@ -0,0 +1,53 @@
+"""foreign key indexes and uniqueness
+
+Revision ID: d5e6f7a8b9c0
+Revises: c3d9e8f1a2b6
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e6f7a8b9c0'
+down_revision = 'c3d9e8f1a2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate rows, keeping the oldest, before adding the unique constraints
+    for table in ('application', 'wishlist'):
+        op.execute(
+            f"DELETE FROM {table} WHERE id NOT IN "
+            f"(SELECT min(id) FROM {table} GROUP BY user_id, property_id)"
+        )
+
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_property_listed_by'), ['listed_by'], unique=False)
+
+    with op.batch_alter_table('application', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_application_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_application_property_id'), ['property_id'], unique=False)
+        batch_op.create_unique_constraint('uq_application_user_property', ['user_id', 'property_id'])
+
+    with op.batch_alter_table('wishlist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_wishlist_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_wishlist_property_id'), ['property_id'], unique=False)
+        batch_op.create_unique_constraint('uq_wishlist_user_property', ['user_id', 'property_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('wishlist', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_wishlist_user_property', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_wishlist_property_id'))
+        batch_op.drop_index(batch_op.f('ix_wishlist_user_id'))
+
+    with op.batch_alter_table('application', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_application_user_property', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_application_property_id'))
+        batch_op.drop_index(batch_op.f('ix_application_user_id'))
+
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_property_listed_by'))
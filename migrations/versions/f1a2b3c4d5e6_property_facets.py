@@ -0,0 +1,45 @@
+"""property facet counts
+
+Revision ID: f1a2b3c4d5e6
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a2b3c4d5e6'
+down_revision = 'e7f8a9b0c1d2'
+branch_labels = None
+depends_on = None
+
+# The default FACET_PRICE_BUCKETS; with other bounds configured, run
+# `flask reconcile-facets` after upgrading
+PRICE_BUCKETS = (0, 500, 1000, 2000, 5000, 100000, 500000)
+
+
+def upgrade():
+    op.create_table('property_facet',
+    sa.Column('facet', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+
+    # Count the existing listings, bucketing prices like app.facets.price_bucket
+    bucket = "CASE %s ELSE '%d' END" % (
+        ' '.join("WHEN price < %d THEN '%d'" % (high, low) for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])),
+        PRICE_BUCKETS[-1],
+    )
+    for facet, value in (('property_type', 'CAST(property_type AS VARCHAR(100))'),
+                         ('location', 'location'), ('price', bucket)):
+        op.execute(
+            "INSERT INTO property_facet (facet, value, count) "
+            "SELECT '%s', %s, count(*) FROM property GROUP BY %s" % (facet, value, value)
+        )
+
+
+def downgrade():
+    op.drop_table('property_facet')
@@ -1,9 +1,10 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import usePagedList from '../usePagedList';
 import { Link } from 'react-router-dom';
 
 const Properties = () => {
-    const [properties, setProperties] = useState([]);
+    const { rows: properties, reload, loadMore, hasMore, loading } = usePagedList('/properties');
     const [newProperty, setNewProperty] = useState({ title: '', description: '', price: '', location: '' });
     const [updateProperty, setUpdateProperty] = useState(null);
     const [error, setError] = useState('');
@@ -14,13 +15,9 @@ const Properties = () => {
         fetchProperties();
     }, []);
 
-const fetchProperties = async () => {
+const fetchProperties = async (next = reload) => {
     try {
-        const response = await axios.get('/properties', {
-            headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-        });
-        console.log(response.data); // Log the response data
-        setProperties(response.data);
+        await next();
     } catch (error) {
         setError('Error fetching properties');
     }
@@ -205,6 +202,9 @@ const handleAddToWishlist = async (id) => {
                     <p>No properties available.</p>
                 )}
             </ul>
+            {hasMore && (
+                <button onClick={() => fetchProperties(loadMore)} disabled={loading}>Load more</button>
+            )}
         </div>
     );
 };
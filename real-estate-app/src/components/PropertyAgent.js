@@ -1,11 +1,23 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import usePagedList from '../usePagedList';
+import usePropertyLookup, { fetchByIds } from '../usePropertyLookup';
 import { useNavigate } from 'react-router-dom';
 import './PropertyAgent.css';
 
 const PropertiesAgent = () => {
-    const [properties, setProperties] = useState([]);
-    const [applications, setApplications] = useState([]);
+    const {
+        rows: properties, reload: reloadProperties, loadMore: loadMoreProperties,
+        hasMore: hasMoreProperties, loading: loadingProperties,
+        has: hasProperty, upsert: upsertProperties, remove: removeProperties
+    } = usePagedList('/properties');
+    const {
+        rows: applications, setRows: setApplications, reload: reloadApplications,
+        loadMore: loadMoreApplications, hasMore: hasMoreApplications, loading: loadingApplications,
+        upsert: upsertApplications
+    } = usePagedList('/agent/applications');
+    const [applicationProperties, updateApplicationProperties, hasApplicationProperty] =
+        usePropertyLookup(applications.map((application) => application.property_id));
     const [users, setUsers] = useState([]); // Store user details
     const [newProperty, setNewProperty] = useState({ title: '', description: '', price: '', location: '', property_type: 'Apartment' });
     const [updateProperty, setUpdateProperty] = useState(null);
@@ -21,23 +33,54 @@ const PropertiesAgent = () => {
         fetchAgentApplications();
     }, []);
 
-    const fetchProperties = async () => {
+    // Apply server changes to the rows on screen, fetching only the rows an event
+    // names; a reset means events were missed, so only then are the lists reloaded.
+    // Application events only reach the applicant and the listing's agent.
+    // (EventSource cannot send headers, hence ?jwt=)
+    useEffect(() => {
+        const events = new EventSource(`/events?jwt=${localStorage.getItem('token')}`);
+        const listen = (type, handler) => events.addEventListener(type, (event) =>
+            handler(JSON.parse(event.data)).catch(() => setError('Error applying live updates')));
+
+        listen('property.created', async ({ ids }) => {
+            upsertProperties(await fetchByIds('/properties', ids), true);
+        });
+        listen('property.updated', async ({ ids }) => {
+            const shown = ids.filter((id) => hasProperty(id) || hasApplicationProperty(id));
+            if (shown.length === 0) return;
+            const rows = await fetchByIds('/properties', shown);
+            upsertProperties(rows);
+            updateApplicationProperties(rows);
+        });
+        listen('property.deleted', async ({ ids }) => {
+            // Their applications are deleted with them
+            removeProperties(ids);
+            setApplications((previous) => previous.filter((app) => !ids.includes(app.property_id)));
+        });
+        listen('application.submitted', async ({ id }) => {
+            upsertApplications(await fetchByIds('/agent/applications', [id]), true);
+        });
+        listen('application.updated', async ({ id, status }) => {
+            setApplications((previous) => previous.map((app) => (app.id === id ? { ...app, status } : app)));
+        });
+        events.addEventListener('reset', () => {
+            fetchProperties();
+            fetchAgentApplications();
+        });
+        return () => events.close();
+    }, []);
+
+    const fetchProperties = async (next = reloadProperties) => {
         try {
-            const response = await axios.get('/properties', {
-                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-            });
-            setProperties(response.data || []);
+            await next();
         } catch (error) {
             setError('Error fetching properties');
         }
     };
 
-    const fetchAgentApplications = async () => {
+    const fetchAgentApplications = async (next = reloadApplications) => {
         try {
-            const response = await axios.get('/agent/applications', {
-                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-            });
-            setApplications(response.data || []);
+            await next();
         } catch (error) {
             setError('Error fetching applications');
         }
@@ -55,13 +98,13 @@ const PropertiesAgent = () => {
         }
 
         try {
-            await axios.post('/properties', newProperty, {
+            const response = await axios.post('/properties', newProperty, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Property created successfully!');
             setNewProperty({ title: '', description: '', price: '', location: '', property_type: 'Apartment' });
             setShowCreateForm(false);
-            fetchProperties();
+            upsertProperties([response.data], true);
         } catch (error) {
             setError('Error creating property');
         }
@@ -75,12 +118,13 @@ const PropertiesAgent = () => {
         }
 
         try {
-            await axios.put(`/properties/${updateProperty.id}`, updateProperty, {
+            const response = await axios.put(`/properties/${updateProperty.id}`, updateProperty, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Property updated successfully!');
             setUpdateProperty(null);
-            fetchProperties();
+            upsertProperties([response.data]);
+            updateApplicationProperties([response.data]);
         } catch (error) {
             setError('Error updating property');
         }
@@ -94,8 +138,9 @@ const PropertiesAgent = () => {
                     headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
                 });
                 setSuccess('Property deleted successfully!');
-                fetchProperties();
-                fetchAgentApplications();
+                // Its applications went with it
+                removeProperties([id]);
+                setApplications((previous) => previous.filter((app) => app.property_id !== id));
             } catch (error) {
                 setError('Error deleting property');
             }
@@ -141,7 +186,7 @@ const PropertiesAgent = () => {
             applications
                 .filter(application => application.status === status)
                 .map(application => {
-                    const property = properties.find(p => p.id === application.property_id); // Find the property associated with the application
+                    const property = applicationProperties[application.property_id]; // The property associated with the application
                     return (
                         <li key={application.id} className="application-item">
                             <p>Application ID: {application.id}</p>
@@ -349,6 +394,11 @@ const PropertiesAgent = () => {
                         <p>No properties available</p>
                     )}
                 </ul>
+                {hasMoreProperties && (
+                    <button className="load-more-button" onClick={() => fetchProperties(loadMoreProperties)} disabled={loadingProperties}>
+                        Load more properties
+                    </button>
+                )}
             </div>
         )}
 
@@ -379,6 +429,11 @@ const PropertiesAgent = () => {
                         <ul>{renderApplicationsByStatus('rejected')}</ul>
                     </div>
                 )}
+                {hasMoreApplications && (
+                    <button className="load-more-button" onClick={() => fetchAgentApplications(loadMoreApplications)} disabled={loadingApplications}>
+                        Load more applications
+                    </button>
+                )}
             </div>
         )}
 
@@ -1,12 +1,22 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
+import usePagedList from '../usePagedList';
+import usePropertyLookup, { fetchByIds } from '../usePropertyLookup';
 import { useNavigate } from 'react-router-dom';
 import './PropertyBuyer.css';
 
 const PropertyBuyer = () => {
-    const [properties, setProperties] = useState([]);
+    // The server flags wishlisted listings on each page, so the wishlist itself is never downloaded
+    const {
+        rows: properties, setRows: setProperties, reload: reloadProperties, loadMore: loadMoreProperties,
+        hasMore: hasMoreProperties, loading: loadingProperties,
+        has: hasProperty, upsert: upsertProperties, remove: removeProperties
+    } = usePagedList('/properties', { include: 'is_wishlisted' });
     const [applications, setApplications] = useState([]);
-    const [wishlist, setWishlist] = useState([]);
+    const knownApplications = useRef(applications);
+    knownApplications.current = applications;
+    const [applicationProperties, updateApplicationProperties, hasApplicationProperty] = usePropertyLookup(
+        applications.map((application) => application.property_id));
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
     const [filterType, setFilterType] = useState('');
@@ -16,7 +26,43 @@ const PropertyBuyer = () => {
     useEffect(() => {
         fetchProperties();
         fetchApplications();
-        fetchWishlist();
+    }, []);
+
+    // Patch the rows an event names (EventSource cannot send headers, hence ?jwt=); the server
+    // only sends this buyer application events for their own applications
+    useEffect(() => {
+        const events = new EventSource(`/events?jwt=${localStorage.getItem('token')}`);
+        const listen = (type, handler) => events.addEventListener(type, (event) =>
+            handler(JSON.parse(event.data)).catch(() => setError('Error applying live updates')));
+
+        listen('property.created', async ({ ids }) => {
+            upsertProperties(await fetchByIds('/properties', ids, { include: 'is_wishlisted' }), true);
+        });
+        listen('property.updated', async ({ ids }) => {
+            const shown = ids.filter((id) => hasProperty(id) || hasApplicationProperty(id));
+            if (shown.length === 0) return;
+            const rows = await fetchByIds('/properties', shown, { include: 'is_wishlisted' });
+            upsertProperties(rows);
+            updateApplicationProperties(rows);
+        });
+        listen('property.deleted', async ({ ids }) => {
+            // Their applications are deleted with them
+            removeProperties(ids);
+            setApplications((previous) => previous.filter((app) => !ids.includes(app.property_id)));
+        });
+        listen('application.submitted', async ({ id }) => {
+            if (knownApplications.current.some((app) => app.id === id)) return; // submitted from this page
+            const rows = await fetchByIds('/applications', [id]);
+            setApplications((previous) => [...rows.filter((row) => !previous.some((app) => app.id === row.id)), ...previous]);
+        });
+        listen('application.updated', async ({ id, status }) => {
+            setApplications((previous) => previous.map((app) => (app.id === id ? { ...app, status } : app)));
+        });
+        events.addEventListener('reset', () => {
+            fetchProperties();
+            fetchApplications();
+        });
+        return () => events.close();
     }, []);
 
     const scrollToTop = () => {
@@ -26,12 +72,9 @@ const PropertyBuyer = () => {
         });
     };
 
-    const fetchProperties = async () => {
+    const fetchProperties = async (next = reloadProperties) => {
         try {
-            const response = await axios.get('/properties', {
-                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-            });
-            setProperties(response.data);
+            await next();
         } catch (error) {
             setError('Error fetching properties');
         }
@@ -48,24 +91,13 @@ const PropertyBuyer = () => {
         }
     };
 
-    const fetchWishlist = async () => {
-        try {
-            const response = await axios.get('/wishlist', {
-                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-            });
-            setWishlist(response.data);
-        } catch (error) {
-            setError('Error fetching wishlist');
-        }
-    };
-
     const handleApplyToProperty = async (propertyId) => {
         try {
-            await axios.post('/applications', { property_id: propertyId }, {
+            const response = await axios.post('/applications', { property_id: propertyId }, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Application submitted');
-            fetchApplications();
+            setApplications((previous) => [response.data, ...previous.filter((app) => app.id !== response.data.id)]);
         } catch (error) {
             setError('Error applying to property');
         }
@@ -77,19 +109,24 @@ const PropertyBuyer = () => {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Application canceled');
-            fetchApplications();
+            setApplications((previous) => previous.filter((app) => app.id !== applicationId));
         } catch (error) {
             setError('Error canceling application');
         }
     };
 
+    const setWishlisted = (propertyId, isWishlisted) => {
+        setProperties((previous) => previous.map((property) =>
+            property.id === propertyId ? { ...property, is_wishlisted: isWishlisted } : property));
+    };
+
     const handleAddToWishlist = async (propertyId) => {
         try {
             await axios.post('/wishlist', { property_id: propertyId }, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Property added to wishlist');
-            fetchWishlist();
+            setWishlisted(propertyId, true);
         } catch (error) {
             setError('Error adding to wishlist');
         }
@@ -102,7 +139,7 @@ const PropertyBuyer = () => {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
             });
             setSuccess('Property removed from wishlist');
-            fetchWishlist();
+            setWishlisted(propertyId, false);
         } catch (error) {
             setError('Error removing from wishlist');
         }
@@ -132,10 +169,6 @@ const PropertyBuyer = () => {
         return applications.some(application => application.property_id === propertyId);
     };
 
-    const isInWishlist = (propertyId) => {
-        return Array.isArray(wishlist) && wishlist.some(item => item.property_id === propertyId);
-    };
-
     const handleLogout = () => {
         localStorage.removeItem('token');
         navigate('/login');
@@ -193,6 +226,16 @@ const PropertyBuyer = () => {
                                                 Apply to Property
                                             </button>
                                         )}
+
+                                        {property.is_wishlisted ? (
+                                            <button className="wishlist-button" onClick={() => handleRemoveFromWishlist(property.id)}>
+                                                Remove from Wishlist
+                                            </button>
+                                        ) : (
+                                            <button className="wishlist-button" onClick={() => handleAddToWishlist(property.id)}>
+                                                Add to Wishlist
+                                            </button>
+                                        )}
                                     </div>
                                 </div>
                             ))
@@ -200,6 +243,11 @@ const PropertyBuyer = () => {
                             <p>No properties available</p>
                         )}
                     </div>
+                    {hasMoreProperties && (
+                        <button className="load-more-button" onClick={() => fetchProperties(loadMoreProperties)} disabled={loadingProperties}>
+                            Load more properties
+                        </button>
+                    )}
                 </>
             )}
 
@@ -209,7 +257,7 @@ const PropertyBuyer = () => {
         <ul>
             {applications.length > 0 ? (
                 applications.map((application) => {
-                    const property = properties.find(p => p.id === application.property_id); // Find the property associated with the application
+                    const property = applicationProperties[application.property_id]; // The property associated with the application
                     const getStatusColor = (status) => {
                         switch (status) {
                             case 'approved':
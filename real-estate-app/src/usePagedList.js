@@ -0,0 +1,47 @@
+import { useCallback, useRef, useState } from 'react';
+import axios from 'axios';
+
+// One page of a list endpoint at a time: reload() fetches the first page and
+// loadMore() follows X-Next-Cursor only when the user asks for more
+const usePagedList = (url, params = {}, pageSize = 50) => {
+    const [rows, setRows] = useState([]);
+    const [cursor, setCursor] = useState(null);
+    const [loading, setLoading] = useState(false);
+    const latest = useRef(0);
+    const current = useRef(rows);
+    current.current = rows;
+    const query = JSON.stringify(params);
+
+    const fetchPage = useCallback(async (after) => {
+        const request = ++latest.current;
+        setLoading(true);
+        try {
+            const response = await axios.get(url, {
+                headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+                params: { limit: pageSize, ...JSON.parse(query), ...(after ? { cursor: after } : {}) }
+            });
+            if (request !== latest.current) return; // a newer reload replaced this list
+            setRows((previous) => (after ? [...previous, ...response.data] : response.data));
+            setCursor(response.headers['x-next-cursor'] || null);
+        } finally {
+            if (request === latest.current) setLoading(false);
+        }
+    }, [url, query, pageSize]);
+
+    const reload = useCallback(() => fetchPage(null), [fetchPage]);
+    const loadMore = useCallback(() => (cursor ? fetchPage(cursor) : Promise.resolve()), [fetchPage, cursor]);
+
+    // Change events patch the loaded rows in place instead of reloading the list
+    const has = useCallback((id) => current.current.some((row) => row.id === id), []);
+    const upsert = useCallback((changed, prepend = false) => setRows((previous) => {
+        const byId = new Map(changed.map((row) => [row.id, row]));
+        const known = new Set(previous.map((row) => row.id));
+        const added = prepend ? changed.filter((row) => !known.has(row.id)) : [];
+        return [...added, ...previous.map((row) => byId.get(row.id) || row)];
+    }), []);
+    const remove = useCallback((ids) => setRows((previous) => previous.filter((row) => !ids.includes(row.id))), []);
+
+    return { rows, setRows, reload, loadMore, hasMore: cursor !== null, loading, has, upsert, remove };
+};
+
+export default usePagedList;
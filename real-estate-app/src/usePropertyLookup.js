@@ -0,0 +1,55 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import axios from 'axios';
+
+// List endpoints take at most this many ids (the server's MAX_PAGE_SIZE)
+const MAX_IDS = 200;
+
+// Fetch specific rows of a list endpoint with ?ids=, one request per MAX_IDS ids
+export const fetchByIds = async (url, ids, params = {}) => {
+    const rows = [];
+    for (let start = 0; start < ids.length; start += MAX_IDS) {
+        const chunk = ids.slice(start, start + MAX_IDS);
+        const response = await axios.get(url, {
+            headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+            params: { ...params, ids: chunk.join(','), limit: chunk.length }
+        });
+        rows.push(...response.data);
+    }
+    return rows;
+};
+
+// Listings by id for views that refer to listings they have not paged in,
+// such as applications; each id is fetched once and deleted ones map to null
+const usePropertyLookup = (ids) => {
+    const [found, setFound] = useState({});
+    const current = useRef(found);
+    current.current = found;
+    const key = [...new Set(ids)].sort((a, b) => a - b).join(',');
+
+    useEffect(() => {
+        const missing = key ? key.split(',').map(Number).filter((id) => !(id in found)) : [];
+        if (missing.length === 0) return;
+        fetchByIds('/properties', missing)
+            .then((rows) => setFound((previous) => {
+                const next = { ...previous };
+                missing.forEach((id) => { next[id] = null; });
+                rows.forEach((row) => { next[row.id] = row; });
+                return next;
+            }))
+            .catch(() => {}); // leave them unknown and retry on the next change
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [key]);
+
+    // For change events: which listings are held, and replacing or dropping them
+    const has = useCallback((id) => Boolean(current.current[id]), []);
+    const update = useCallback((rows, removed = []) => setFound((previous) => {
+        const next = { ...previous };
+        rows.forEach((row) => { if (row.id in next) next[row.id] = row; });
+        removed.forEach((id) => { if (id in next) next[id] = null; });
+        return next;
+    }), []);
+
+    return [found, update, has];
+};
+
+export default usePropertyLookup;
@@ -0,0 +1,114 @@
+# tests/test_events.py
+
+import pytest
+from flask import Flask
+
+from app.events import EventBroker, TooManySubscribers
+
+
+@pytest.fixture
+def broker():
+    app = Flask(__name__)
+    app.config.update(EVENTS_BUFFER_SIZE=3, EVENTS_HEARTBEAT_SECONDS=0.01, EVENTS_MAX_SUBSCRIBERS=2)
+    return EventBroker(app)
+
+
+def frames(stream):
+    """The (id, event) pairs of the next chunk a stream yields."""
+    chunk = next(stream)
+    return [
+        tuple(line.split(': ', 1)[1] for line in frame.splitlines()[:2])
+        for frame in chunk.split('\n\n') if frame.startswith('id: ')
+    ]
+
+
+def open_stream(broker, user_id=1, last_event_id=None, types=None):
+    stream = broker.subscribe(user_id, last_event_id, types)
+    assert next(stream) == 'retry: 3000\n\n'
+    return stream
+
+
+def test_cursor(broker):
+    for i in range(5):
+        broker.publish('property.created', {'ids': [i]})
+    epoch = broker._epoch
+
+    assert broker._cursor(None) == (5, False)
+    assert broker._cursor(f'{epoch}-4') == (4, False)
+    # Events 3 to 5 are buffered, so resuming after 2 misses nothing
+    assert broker._cursor(f'{epoch}-2') == (2, False)
+    # Event 2 has been dropped: replay what is left after a reset
+    assert broker._cursor(f'{epoch}-1') == (2, True)
+    # Another process, a sequence from the future, or garbage
+    assert broker._cursor('0000-4') == (5, True)
+    assert broker._cursor(f'{epoch}-9') == (5, True)
+    assert broker._cursor(f'{epoch}-x') == (5, True)
+
+
+def test_after(broker):
+    assert broker._after(0) == []
+    for i in range(5):
+        broker.publish('property.created', {'ids': [i]})
+
+    assert [event[0] for event in broker._after(2)] == [3, 4, 5]
+    assert [event[0] for event in broker._after(4)] == [5]
+    assert broker._after(5) == []
+    # Behind the buffer: everything still held
+    assert [event[0] for event in broker._after(0)] == [3, 4, 5]
+
+
+def test_last_event_id_resumes_after_that_event(broker):
+    for i in range(3):
+        broker.publish('property.updated', {'ids': [i]})
+    stream = open_stream(broker, last_event_id=f'{broker._epoch}-1')
+
+    assert frames(stream) == [(f'{broker._epoch}-2', 'property.updated'), (f'{broker._epoch}-3', 'property.updated')]
+    stream.close()
+
+
+def test_stale_last_event_id_gets_a_reset_then_the_buffer(broker):
+    for i in range(5):
+        broker.publish('property.updated', {'ids': [i]})
+    stream = open_stream(broker, last_event_id=f'{broker._epoch}-1')
+
+    assert frames(stream) == [(f'{broker._epoch}-2', 'reset')]
+    assert [event for _, event in frames(stream)] == ['property.updated'] * 3
+    stream.close()
+
+
+def test_reset_is_inserted_when_the_buffer_wraps_under_a_subscriber(broker):
+    stream = open_stream(broker, types=['property'])
+    for i in range(5):
+        broker.publish('property.created', {'ids': [i]})
+
+    # Events 1 and 2 were dropped before the subscriber read them
+    assert frames(stream) == [
+        (f'{broker._epoch}-2', 'reset'),
+        (f'{broker._epoch}-3', 'property.created'),
+        (f'{broker._epoch}-4', 'property.created'),
+        (f'{broker._epoch}-5', 'property.created'),
+    ]
+    stream.close()
+
+
+def test_streams_only_carry_events_for_that_user_and_type(broker):
+    stream = open_stream(broker, user_id=1, types=['application'])
+    broker.publish('application.submitted', {'id': 1}, users={2})
+    broker.publish('property.created', {'ids': [1]})
+    broker.publish('application.updated', {'id': 2}, users={1, 2})
+
+    assert frames(stream) == [(f'{broker._epoch}-3', 'application.updated')]
+    assert next(stream) == ': keep-alive\n\n'
+    stream.close()
+
+
+def test_subscribers_are_capped_and_freed_on_close(broker):
+    first, second = broker.subscribe(1), broker.subscribe(2)
+    with pytest.raises(TooManySubscribers):
+        broker.subscribe(3)
+
+    first.close()
+    assert broker.stats()['subscribers'] == 1
+    broker.subscribe(3).close()
+    second.close()
+    assert broker.stats()['subscribers'] == 0
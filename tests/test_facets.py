@@ -0,0 +1,57 @@
+# tests/test_facets.py
+
+import pytest
+
+from app import create_app
+from app.cache import response_cache
+from app.config import Config
+
+PROPERTY = dict(title='Loft', description='Bright corner flat', location='Riverside', property_type='Apartment')
+
+
+def login(client, name, role):
+    client.post('/register', json=dict(username=name, email=f'{name}@example.com', password='secret', role=role))
+    response = client.post('/login', json=dict(email=f'{name}@example.com', password='secret'))
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'facets.db'}")
+    monkeypatch.setattr(Config, 'DB_STARTUP', 'create')
+    client = create_app().test_client()
+    response_cache.clear()
+    yield client, login(client, 'agent', 'agent')
+    response_cache.clear()
+
+
+def price_counts(client, headers):
+    response = client.get('/properties/facets', headers=headers)
+    assert response.status_code == 200
+    return {entry['value']: entry['count'] for entry in response.get_json()['price']}
+
+
+def test_counts_follow_inserts_updates_and_deletes(api):
+    client, agent = api
+    first = client.post('/properties', json=dict(PROPERTY, price=700), headers=agent).get_json()['id']
+    client.post('/properties', json=dict(PROPERTY, price=1200), headers=agent)
+    assert price_counts(client, agent) == {'500': 1, '1000': 1}
+
+    assert client.put(f'/properties/{first}', json={'price': 6000}, headers=agent).status_code == 200
+    assert price_counts(client, agent) == {'1000': 1, '5000': 1}
+
+    assert client.delete(f'/properties/{first}', headers=agent).status_code == 200
+    assert price_counts(client, agent) == {'1000': 1}
+
+
+def test_prices_sent_as_strings_are_bucketed_as_numbers(api):
+    client, agent = api
+    response = client.post('/properties', json=dict(PROPERTY, price='1500'), headers=agent)
+    assert response.status_code == 201
+    assert price_counts(client, agent) == {'1000': 1}
+
+    property_id = response.get_json()['id']
+    response = client.put(f'/properties/{property_id}', json={'price': '2500'}, headers=agent)
+    assert response.status_code == 200
+    assert response.get_json()['price'] == 2500.0
+    assert price_counts(client, agent) == {'2000': 1}
@@ -0,0 +1,132 @@
+# tests/test_query_plans.py
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.cache import response_cache
+from app.config import Config
+from app.similar import similar_index
+
+# Tables that grow with usage; reading all of one on a request is a bug
+LARGE_TABLES = ('property', 'application', 'wishlist')
+SCAN = re.compile(r'^SCAN (%s)\b' % '|'.join(LARGE_TABLES))
+LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+# Requests that read a whole table on purpose, and the statements allowed to
+EXPECTED_SCANS = {
+    # The export streams every listing in batches
+    '/export/properties': ('FROM property ORDER BY property.id',),
+    # The similarity index is loaded from both tables on first use
+    '/properties/1/similar': ('FROM property', 'FROM wishlist'),
+}
+
+PROPERTY = dict(description='Bright corner flat', price=100000, property_type='Apartment')
+
+# (method, path, JSON body, who), run in order against one seeded database
+REQUESTS = [
+    ('get', '/properties', None, 'buyer'),
+    ('get', '/properties?cursor=WzEwXQ', None, 'buyer'),
+    ('get', '/properties?location=Riverside&property_type=Apartment&sort=price_asc', None, 'buyer'),
+    ('get', '/properties?sort=popular&include=is_wishlisted', None, 'buyer'),
+    ('get', '/properties?ids=1,3,5', None, 'buyer'),
+    ('get', '/properties/search?q=corner', None, 'buyer'),
+    ('get', '/properties/facets', None, 'buyer'),
+    ('get', '/properties/nearby?lat=51.5&lon=-0.1&radius=10', None, 'buyer'),
+    ('get', '/properties/within?min_lat=51&min_lon=-1&max_lat=52&max_lon=1', None, 'buyer'),
+    ('get', '/properties/1/similar', None, 'buyer'),
+    ('get', '/applications', None, 'buyer'),
+    ('get', '/applications?status=pending', None, 'buyer'),
+    ('get', '/applications?ids=1,2', None, 'buyer'),
+    ('get', '/wishlist', None, 'buyer'),
+    ('get', '/agent/applications', None, 'agent'),
+    ('get', '/agent/applications?status=pending&property_id=2', None, 'agent'),
+    ('get', '/agent/applications?ids=3', None, 'agent'),
+    ('get', '/agent/dashboard', None, 'agent'),
+    ('get', '/export/properties', None, 'agent'),
+    ('get', '/export/agent/applications', None, 'agent'),
+    ('post', '/properties', dict(PROPERTY, title='New', location='Docks'), 'agent'),
+    ('post', '/applications', {'property_id': 6}, 'buyer'),
+    ('post', '/wishlist', {'property_id': 6}, 'buyer'),
+    ('put', '/properties/2', {'price': 90000}, 'agent'),
+    ('put', '/applications/1/accept', None, 'agent'),
+    ('put', '/applications/2/reject', None, 'agent'),
+    ('put', '/applications/batch', {'approve': 3}, 'agent'),
+    ('put', '/applications/batch', {'ids': [4], 'status': 'rejected'}, 'agent'),
+    ('delete', '/wishlist', {'property_id': 1}, 'buyer'),
+    ('delete', '/applications/5', None, 'buyer'),
+    ('delete', '/properties/10', None, 'agent'),
+    ('delete', '/properties/batch', {'ids': [8, 9]}, 'agent'),
+]
+
+
+def login(client, name, role):
+    client.post('/register', json=dict(username=name, email=f'{name}@example.com', password='secret', role=role))
+    response = client.post('/login', json=dict(email=f'{name}@example.com', password='secret'))
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+        patch.setattr(Config, 'DB_STARTUP', 'create')
+        app = create_app()
+    similar_index.built_at = None
+    client = app.test_client()
+
+    users = {'agent': login(client, 'agent', 'agent'), 'buyer': login(client, 'buyer', 'buyer')}
+    for i in range(10):
+        client.post('/properties', headers=users['agent'], json=dict(
+            PROPERTY, title=f'Flat {i}', location=('Riverside', 'Old Town')[i % 2],
+            latitude=51.5 + i / 100, longitude=-0.1 + i / 100,
+        ))
+    for property_id in range(1, 6):
+        client.post('/applications', headers=users['buyer'], json={'property_id': property_id})
+        client.post('/wishlist', headers=users['buyer'], json={'property_id': property_id})
+
+    with app.app_context():
+        engine = db.engine
+    yield app, client, users, engine
+    similar_index.built_at = None
+    response_cache.clear()
+
+
+def full_scans(connection, statement, parameters):
+    """Plan rows of ``statement`` that read a whole large table.
+
+    A walk in index order that stops at a LIMIT is a page, not a full scan.
+    """
+    plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+    if LIMIT.search(statement) and not any(detail.startswith('USE TEMP B-TREE') for detail in plan):
+        return []
+    return [detail for detail in plan if SCAN.match(detail)]
+
+
+@pytest.mark.parametrize('method, path, body, who', REQUESTS, ids=[f'{m.upper()} {p}' for m, p, _, _ in REQUESTS])
+def test_no_full_table_scans(api, method, path, body, who):
+    app, client, users, engine = api
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'):
+            statements.append((statement, parameters))
+
+    response_cache.clear()
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response = getattr(client, method)(path, json=body, headers=users[who])
+        response.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert response.status_code < 400, response.get_data(as_text=True)
+    assert statements
+
+    allowed = EXPECTED_SCANS.get(path, ())
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            if any(statement.rstrip().endswith(tail) for tail in allowed):
+                continue
+            assert not full_scans(connection, statement, parameters), statement
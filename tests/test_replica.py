@@ -0,0 +1,98 @@
+# tests/test_replica.py
+
+import sqlite3
+
+import pytest
+
+from app import create_app
+from app.cache import response_cache
+from app.config import Config
+from app.database import recent_writers
+
+PROPERTY = dict(description='Bright corner flat', price=100000, location='Riverside', property_type='Apartment')
+
+
+def login(client, name, role):
+    client.post('/register', json=dict(username=name, email=f'{name}@example.com', password='secret', role=role))
+    response = client.post('/login', json=dict(email=f'{name}@example.com', password='secret'))
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+
+class Replicator:
+    """Stand-in for asynchronous replication: copies the primary file to the replica on demand."""
+
+    def __init__(self, primary, replica):
+        self.primary = primary
+        self.replica = replica
+
+    def sync(self):
+        source, target = sqlite3.connect(self.primary), sqlite3.connect(self.replica)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+
+@pytest.fixture
+def api(request, tmp_path, monkeypatch):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}')
+    monkeypatch.setattr(Config, 'DB_STARTUP', 'create')
+    monkeypatch.setattr(Config, 'READ_YOUR_WRITES_SECONDS', getattr(request, 'param', 60))
+    replicator = Replicator(primary, replica)
+    replicator.sync()
+
+    app = create_app(replica_url=f'sqlite:///{replica}')
+    client = app.test_client()
+    users = {'agent': login(client, 'agent', 'agent'), 'buyer': login(client, 'buyer', 'buyer')}
+    replicator.sync()
+    recent_writers.clear()
+    response_cache.clear()
+    yield client, users, replicator
+    recent_writers.clear()
+    response_cache.clear()
+
+
+def titles(client, headers):
+    response = client.get('/properties', headers=headers)
+    assert response.status_code == 200
+    return [row['title'] for row in response.get_json()], response.headers.get('ETag')
+
+
+def test_reads_go_to_the_replica_until_it_catches_up(api):
+    client, users, replicator = api
+    assert client.post('/properties', json=dict(PROPERTY, title='Loft'), headers=users['agent']).status_code == 201
+
+    assert titles(client, users['buyer'])[0] == []
+    replicator.sync()
+    assert titles(client, users['buyer'])[0] == ['Loft']
+
+
+def test_writers_read_their_own_writes_from_the_primary(api):
+    client, users, replicator = api
+    assert client.post('/properties', json=dict(PROPERTY, title='Loft'), headers=users['agent']).status_code == 201
+
+    assert titles(client, users['agent'])[0] == ['Loft']
+    assert titles(client, users['buyer'])[0] == []
+
+
+# No read-your-writes window at all: as if the replica lagged for longer than it
+@pytest.mark.parametrize('api', [0], indirect=True)
+def test_lagging_replica_reads_are_never_cached_as_current(api):
+    client, users, replicator = api
+    assert titles(client, users['buyer'])[0] == []
+
+    # The primary is ahead: its versions moved, the replica's did not
+    assert client.post('/properties', json=dict(PROPERTY, title='Loft'), headers=users['agent']).status_code == 201
+    stale, stale_etag = titles(client, users['buyer'])
+    assert stale == []
+
+    # Once the replica has the write, the old entry and ETag no longer match
+    replicator.sync()
+    response = client.get('/properties', headers={**users['buyer'], 'If-None-Match': stale_etag})
+    assert response.status_code == 200
+    assert [row['title'] for row in response.get_json()] == ['Loft']
+
+    # The writer's primary read and the caught-up replica agree on the entry
+    assert titles(client, users['agent']) == titles(client, users['buyer'])